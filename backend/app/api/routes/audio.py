@@ -1,13 +1,19 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Header
+from typing import Optional
 from app.tasks.audio_tasks import process_audio_task
 from app.core.redis import redis_client
+from app.core.blob_store import blob_store
+from app.core.dedup import submit_once, dedup_key_for, existing_result
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.post("/process-audio")
-async def process_audio(audio_file: UploadFile = File(...)):
+async def process_audio(
+    audio_file: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None)
+):
     """
     Endpoint para procesar audio de forma asíncrona
     """
@@ -16,23 +22,36 @@ async def process_audio(audio_file: UploadFile = File(...)):
         if not audio_file.filename.endswith(('.wav', '.mp3', '.m4a')):
             raise HTTPException(400, "Formato de audio no soportado")
         
-        # Leer archivo
-        audio_data = await audio_file.read()
+        # Guardar el archivo una sola vez; la tarea recibe solo la referencia
+        blob_key = await blob_store.put_upload(audio_file)
         
-        # Ejecutar tarea asíncrona
-        task = process_audio_task.delay(audio_data, audio_file.filename)
+        # Ejecutar tarea asíncrona (o reutilizar una idéntica reciente)
+        task_id, deduplicated = submit_once(
+            process_audio_task,
+            (blob_key, audio_file.filename),
+            dedup_key_for(blob_key, idempotency_key)
+        )
+        
+        if deduplicated:
+            return {
+                "message": "Audio ya enviado anteriormente",
+                "task_id": task_id,
+                "deduplicated": True,
+                "result": existing_result(task_id),
+                "status_url": f"/api/v1/tasks/{task_id}/status"
+            }
         
         # Guardar en Redis para seguimiento
         redis_client.setex(
-            f"audio_task:{task.id}",
+            f"audio_task:{task_id}",
             3600,  # Expira en 1 hora
             "processing"
         )
         
         return {
             "message": "Audio en procesamiento",
-            "task_id": task.id,
-            "status_url": f"/api/v1/tasks/{task.id}/status"
+            "task_id": task_id,
+            "status_url": f"/api/v1/tasks/{task_id}/status"
         }
         
     except Exception as e:
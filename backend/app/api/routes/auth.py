@@ -1,10 +1,11 @@
 # app/api/routes/auth.py
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 import hashlib
-import sqlite3
+from app.core.audit import audit_log, audit_lifespan
+from app.core.database import db
 
-router = APIRouter()
+router = APIRouter(lifespan=audit_lifespan)
 
 class VoiceLoginRequest(BaseModel):
     dui: str
@@ -14,21 +15,13 @@ class VoiceRegisterRequest(BaseModel):
     dui: str
     audio_data: str
 
-# Conexión simple a SQLite
-def get_db():
-    conn = sqlite3.connect("idn_sv.db")
-    try:
-        yield conn
-    finally:
-        conn.close()
-
 @router.post("/voice-login")
-async def voice_login(login_data: VoiceLoginRequest, conn: sqlite3.Connection = Depends(get_db)):
-    cursor = conn.cursor()
-    
+async def voice_login(login_data: VoiceLoginRequest, request: Request):
     # Buscar usuario
-    cursor.execute("SELECT id FROM usuarios WHERE dui = ?", (login_data.dui,))
-    usuario = cursor.fetchone()
+    usuario = await db.fetchone(
+        "SELECT id FROM usuarios WHERE numero_identificacion = :numero",
+        {"numero": login_data.dui}
+    )
     
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
@@ -36,11 +29,17 @@ async def voice_login(login_data: VoiceLoginRequest, conn: sqlite3.Connection =
     # Verificar voz (hash simulado)
     voice_hash = hashlib.sha256(login_data.audio_data.encode()).hexdigest()
     
-    cursor.execute(
-        "SELECT id FROM voice_profiles WHERE usuario_id = ? AND voice_hash = ?",
-        (usuario[0], voice_hash)
+    voice_profile = await db.fetchone(
+        "SELECT id FROM voice_profiles WHERE usuario_id = :usuario_id AND voice_hash = :voice_hash",
+        {"usuario_id": usuario[0], "voice_hash": voice_hash}
+    )
+    
+    await audit_log.log(
+        "VOICE_LOGIN" if voice_profile else "VOICE_LOGIN_FAILED",
+        f"Inicio de sesión por voz de {login_data.dui}",
+        usuario_id=usuario[0],
+        ip_address=request.client.host if request.client else None
     )
-    voice_profile = cursor.fetchone()
     
     if voice_profile:
         return {"authenticated": True, "usuario_id": usuario[0]}
@@ -48,21 +47,27 @@ async def voice_login(login_data: VoiceLoginRequest, conn: sqlite3.Connection =
         return {"authenticated": False}
 
 @router.post("/register-voice")
-async def register_voice(voice_data: VoiceRegisterRequest, conn: sqlite3.Connection = Depends(get_db)):
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT id FROM usuarios WHERE dui = ?", (voice_data.dui,))
-    usuario = cursor.fetchone()
+async def register_voice(voice_data: VoiceRegisterRequest, request: Request):
+    usuario = await db.fetchone(
+        "SELECT id FROM usuarios WHERE numero_identificacion = :numero",
+        {"numero": voice_data.dui}
+    )
     
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     
     voice_hash = hashlib.sha256(voice_data.audio_data.encode()).hexdigest()
     
-    cursor.execute(
-        "INSERT OR REPLACE INTO voice_profiles (usuario_id, voice_hash) VALUES (?, ?)",
-        (usuario[0], voice_hash)
+    await db.execute(
+        "INSERT INTO voice_profiles (usuario_id, voice_hash) VALUES (:usuario_id, :voice_hash)",
+        {"usuario_id": usuario[0], "voice_hash": voice_hash}
+    )
+    
+    await audit_log.log_committed(
+        "VOICE_REGISTER",
+        f"Perfil de voz registrado para {voice_data.dui}",
+        usuario_id=usuario[0],
+        ip_address=request.client.host if request.client else None
     )
-    conn.commit()
     
     return {"message": "Voz registrada exitosamente"}
\ No newline at end of file
@@ -1,21 +1,15 @@
 # app/api/routes/biometria_avanzada.py
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
-import sqlite3
+from fastapi import APIRouter, HTTPException, UploadFile, File
+from app.core.stats import read_counters, recent_activity
 import cv2
 import numpy as np
 import hashlib
 from datetime import datetime
 import os
+from app.core.warmup import get_face_cascade
 
 router = APIRouter()
 
-def get_db():
-    conn = sqlite3.connect("idn_sv.db")
-    try:
-        yield conn
-    finally:
-        conn.close()
-
 class ImageProcessor:
     """Procesador de imágenes con OpenCV"""
     
@@ -49,8 +43,7 @@ class ImageProcessor:
             
             # Detectar caras (simulación - sin face_recognition)
             # En producción usaríamos face_recognition aquí
-            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-            faces = face_cascade.detectMultiScale(gray, 1.1, 4)
+            faces = get_face_cascade().detectMultiScale(gray, 1.1, 4)
             
             features["faces_detected"] = len(faces)
             features["face_locations"] = [{"x": x, "y": y, "w": w, "h": h} for (x, y, w, h) in faces]
@@ -86,35 +79,23 @@ async def analyze_image(image_file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Error analizando imagen: {str(e)}")
 
 @router.get("/system-stats")
-async def get_system_stats(conn: sqlite3.Connection = Depends(get_db)):
+async def get_system_stats():
     """Estadísticas avanzadas del sistema"""
-    cursor = conn.cursor()
-    
-    # Estadísticas de usuarios
-    cursor.execute("SELECT COUNT(*) FROM usuarios")
-    total_usuarios = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(DISTINCT usuario_id) FROM voice_profiles")
-    usuarios_con_voz = cursor.fetchone()[0]
-    
-    # Actividad reciente
-    cursor.execute('''
-        SELECT accion, COUNT(*) as count 
-        FROM security_logs 
-        WHERE created_at >= datetime('now', '-1 day')
-        GROUP BY accion
-    ''')
-    actividad_reciente = {row[0]: row[1] for row in cursor.fetchall()}
+    # Totales materializados (system_counters), sin agregados sobre las tablas
+    contadores = await read_counters()
+    total_usuarios = contadores.get("usuarios", 0)
+    usuarios_con_voz = contadores.get("usuarios_voz", 0)
+    total_logs = contadores.get("eventos_seguridad", 0)
     
-    # Uso del sistema
-    cursor.execute("SELECT COUNT(*) FROM security_logs")
-    total_logs = cursor.fetchone()[0]
+    # Actividad reciente desde el resumen por hora (sin recorrer el log)
+    actividad_reciente = await recent_activity(hours=24)
     
     return {
         "estadisticas_avanzadas": {
             "total_usuarios": total_usuarios,
             "usuarios_biometria": usuarios_con_voz,
             "cobertura_biometria": f"{(usuarios_con_voz/total_usuarios*100):.1f}%" if total_usuarios > 0 else "0%",
+            "usuarios_rostro": contadores.get("usuarios_rostro", 0),
             "total_eventos_seguridad": total_logs
         },
         "actividad_24h": actividad_reciente,
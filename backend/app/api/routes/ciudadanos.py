@@ -1,11 +1,52 @@
 # app/api/routes/ciudadanos.py
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from datetime import date
-import sqlite3
+from app.core.audit import audit_log, audit_lifespan
+from app.core.blob_store import BlobStore
+from app.core.config import settings
+from app.core.database import db, get_session
+from sqlalchemy import Date, bindparam, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+import csv
+import json
+import os
+import re
+import time
 
-router = APIRouter()
+router = APIRouter(lifespan=audit_lifespan)
+
+# Los archivos de rechazos tienen su propio espacio de claves: la descarga no
+# debe poder servir otros blobs (audio, imágenes de evidencia)
+rechazos_store = BlobStore(os.path.join(settings.BLOB_STORE_DIR, "rechazos"), settings.BLOB_TTL_SECONDS)
+
+IMPORT_BATCH_SIZE = 5000
+IMPORT_REJECT_SAMPLE = 100     # Rechazos incluidos en la respuesta
+SQLITE_MAX_PARAMS = 900  # Parámetros por consulta IN (límite conservador de SQLite)
+
+_EXISTENTES = text(
+    "SELECT numero_identificacion FROM usuarios WHERE numero_identificacion IN :numeros"
+).bindparams(bindparam("numeros", expanding=True))
+# fecha_nacimiento tipada: SQLite la guarda como 'AAAA-MM-DD' y asyncpg exige un date
+INSERT_CIUDADANOS = text('''
+    INSERT INTO usuarios (tipo_identificacion, numero_identificacion, nombres, apellidos, email, fecha_nacimiento, sector)
+    VALUES (:tipo_identificacion, :numero_identificacion, :nombres, :apellidos, :email, :fecha_nacimiento, :sector)
+''').bindparams(bindparam("fecha_nacimiento", type_=Date))
+
+TIPOS_IDENTIFICACION = {
+    "DUI", "NIT", "PASAPORTE", "LICENCIA",
+    "CARNET_MENORIDAD", "CARNET_RECIEN_NACIDO", "CARNET_ESCOLAR",
+}
+SECTORES = {"ciudadano", "medico", "educativo", "judicial", "laboral", "servicios_sociales", "admin"}
+PAGE_SIZE_DEFAULT = 100
+PAGE_SIZE_MAX = 1000
+EXPORT_CHUNK_SIZE = 1000
+COLUMNAS_LISTADO = "id, tipo_identificacion, numero_identificacion, nombres, apellidos, email, fecha_nacimiento, sector"
+DUI_PATTERN = re.compile(r"^\d{8}-\d$")
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
 # Modelo para registro de ciudadanos
 class CiudadanoCreate(BaseModel):
@@ -15,49 +56,41 @@ class CiudadanoCreate(BaseModel):
     email: Optional[str] = None
     fecha_nacimiento: Optional[date] = None
 
-def get_db():
-    conn = sqlite3.connect("idn_sv.db")
-    try:
-        yield conn
-    finally:
-        conn.close()
+INSERT_CIUDADANO = text('''
+    INSERT INTO usuarios (tipo_identificacion, numero_identificacion, nombres, apellidos, email, fecha_nacimiento)
+    VALUES ('DUI', :numero, :nombres, :apellidos, :email, :fecha_nacimiento)
+    RETURNING id
+''').bindparams(bindparam("fecha_nacimiento", type_=Date))
 
 @router.post("/")
-async def crear_ciudadano(
-    ciudadano: CiudadanoCreate, 
-    conn: sqlite3.Connection = Depends(get_db)
-):
+async def crear_ciudadano(ciudadano: CiudadanoCreate, request: Request, session: AsyncSession = Depends(get_session)):
     """Registrar nuevo ciudadano en el sistema"""
     try:
-        cursor = conn.cursor()
-        
         # Verificar si el DUI ya existe
-        cursor.execute("SELECT id FROM usuarios WHERE dui = ?", (ciudadano.dui,))
-        if cursor.fetchone():
+        existente = (await session.execute(
+            text("SELECT id FROM usuarios WHERE numero_identificacion = :numero"),
+            {"numero": ciudadano.dui}
+        )).first()
+        if existente:
             raise HTTPException(status_code=400, detail="El DUI ya está registrado")
         
-        # Insertar nuevo ciudadano
-        cursor.execute('''
-            INSERT INTO usuarios (dui, nombres, apellidos, email, fecha_nacimiento)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
-            ciudadano.dui,
-            ciudadano.nombres,
-            ciudadano.apellidos,
-            ciudadano.email,
-            ciudadano.fecha_nacimiento
-        ))
-        
-        # Obtener el ID del nuevo usuario
-        user_id = cursor.lastrowid
-        
-        # Registrar en logs de seguridad
-        cursor.execute('''
-            INSERT INTO security_logs (usuario_id, accion, descripcion)
-            VALUES (?, ?, ?)
-        ''', (user_id, "USER_REGISTER", f"Usuario {ciudadano.dui} registrado en el sistema"))
+        # Insertar nuevo ciudadano y obtener su ID
+        user_id = (await session.execute(INSERT_CIUDADANO, {
+            "numero": ciudadano.dui,
+            "nombres": ciudadano.nombres,
+            "apellidos": ciudadano.apellidos,
+            "email": ciudadano.email,
+            "fecha_nacimiento": ciudadano.fecha_nacimiento
+        })).scalar_one()
+        await session.commit()
         
-        conn.commit()
+        # Registrar en logs de seguridad (confirmado antes de responder)
+        await audit_log.log_committed(
+            "USER_REGISTER",
+            f"Usuario {ciudadano.dui} registrado en el sistema",
+            usuario_id=user_id,
+            ip_address=request.client.host if request.client else None
+        )
         
         return {
             "success": True,
@@ -74,19 +107,322 @@ async def crear_ciudadano(
     except HTTPException:
         raise
     except Exception as e:
-        conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error registrando ciudadano: {str(e)}")
 
-# ... (mantener los endpoints existentes de get_ciudadano y get_all_ciudadanos)
+class CiudadanoImporter:
+    """
+    Importación masiva de ciudadanos (CSV o NDJSON) por lotes: validación por
+    columnas, deduplicación con conjuntos e inserción con executemany
+    """
+
+    CAMPOS = ("tipo_identificacion", "numero_identificacion", "nombres", "apellidos", "email", "fecha_nacimiento", "sector")
+
+    def __init__(self, formato="csv"):
+        if formato not in ("csv", "ndjson"):
+            raise ValueError(f"Formato no soportado: {formato}")
+        self.formato = formato
+        self.encabezado = None
+        self.linea = 0
+        self.procesados = 0
+        self.insertados = 0
+        self.rechazados = 0
+        self.inicio = time.perf_counter()
+
+    def parsear(self, lineas):
+        """Convertir líneas de texto en (número de línea, registro); los errores de formato se rechazan"""
+        registros, rechazos = [], []
+        for texto in lineas:
+            self.linea += 1
+            texto = texto.strip()
+            if not texto:
+                continue
+            if self.formato == "csv":
+                valores = next(csv.reader([texto]))
+                if self.encabezado is None:
+                    # "dui" se acepta como alias de numero_identificacion
+                    self.encabezado = ["numero_identificacion" if c.strip().lower() == "dui" else c.strip().lower() for c in valores]
+                    continue
+                registros.append((self.linea, dict(zip(self.encabezado, valores))))
+            else:
+                try:
+                    registro = json.loads(texto)
+                except ValueError:
+                    rechazos.append({"linea": self.linea, "motivo": "JSON inválido", "registro": texto})
+                    continue
+                if not isinstance(registro, dict):
+                    rechazos.append({"linea": self.linea, "motivo": "Se esperaba un objeto", "registro": texto})
+                    continue
+                if "numero_identificacion" not in registro and "dui" in registro:
+                    registro["numero_identificacion"] = registro.pop("dui")
+                registros.append((self.linea, registro))
+        return registros, rechazos
+
+    def validar(self, registros):
+        """Validar el lote columna por columna; devuelve (filas válidas, rechazos)"""
+        lineas = [linea for linea, _ in registros]
+        tipos = [str(r.get("tipo_identificacion") or "DUI").strip().upper() for _, r in registros]
+        numeros = [str(r.get("numero_identificacion") or "").strip() for _, r in registros]
+        nombres = [str(r.get("nombres") or "").strip() for _, r in registros]
+        apellidos = [str(r.get("apellidos") or "").strip() for _, r in registros]
+        emails = [str(r.get("email") or "").strip() or None for _, r in registros]
+        fechas = [str(r.get("fecha_nacimiento") or "").strip() or None for _, r in registros]
+        sectores = [str(r.get("sector") or "ciudadano").strip().lower() for _, r in registros]
+
+        motivos = [None] * len(registros)
+
+        def marcar(condiciones, motivo):
+            for i, falla in enumerate(condiciones):
+                if falla and motivos[i] is None:
+                    motivos[i] = motivo
+
+        marcar([t not in TIPOS_IDENTIFICACION for t in tipos], "Tipo de identificación desconocido")
+        marcar([not n for n in numeros], "Falta el número de identificación")
+        marcar([t == "DUI" and not DUI_PATTERN.match(n) for t, n in zip(tipos, numeros)], "DUI con formato inválido")
+        marcar([not n or not a for n, a in zip(nombres, apellidos)], "Faltan nombres o apellidos")
+        marcar([e is not None and not EMAIL_PATTERN.match(e) for e in emails], "Email inválido")
+        marcar([f is not None and not _fecha_valida(f) for f in fechas], "Fecha de nacimiento inválida")
+        marcar([sector not in SECTORES for sector in sectores], "Sector desconocido")
+
+        validas, rechazos = [], []
+        for i, motivo in enumerate(motivos):
+            if motivo:
+                rechazos.append({"linea": lineas[i], "motivo": motivo, "registro": registros[i][1]})
+            else:
+                fecha = date.fromisoformat(fechas[i]) if fechas[i] else None
+                validas.append((lineas[i], (tipos[i], numeros[i], nombres[i], apellidos[i], emails[i], fecha, sectores[i])))
+        return validas, rechazos
+
+    def deduplicar(self, conn, validas):
+        """Descartar números ya registrados o repetidos dentro del lote"""
+        numeros = list({fila[1] for _, fila in validas})
+        existentes = set()
+        for i in range(0, len(numeros), SQLITE_MAX_PARAMS):
+            bloque = numeros[i:i + SQLITE_MAX_PARAMS]
+            existentes.update(row[0] for row in conn.execute(_EXISTENTES, {"numeros": bloque}))
+
+        filas, rechazos, vistos = [], [], set()
+        for linea, fila in validas:
+            numero = fila[1]
+            if numero in existentes:
+                rechazos.append({"linea": linea, "motivo": "Identificación ya registrada", "registro": dict(zip(self.CAMPOS, fila))})
+            elif numero in vistos:
+                rechazos.append({"linea": linea, "motivo": "Identificación repetida en el archivo", "registro": dict(zip(self.CAMPOS, fila))})
+            else:
+                vistos.add(numero)
+                filas.append((linea, fila))
+        return filas, rechazos
+
+    def insertar(self, conn, filas):
+        """
+        Insertar el lote con un executemany dentro de un savepoint. Si una
+        restricción falla (p. ej. email UNIQUE en bases antiguas, o una inserción
+        concurrente), se reintenta fila por fila y solo las fallidas se rechazan.
+        """
+        try:
+            with conn.begin_nested():
+                conn.execute(INSERT_CIUDADANOS, [dict(zip(self.CAMPOS, fila)) for _, fila in filas])
+            return len(filas), []
+        except IntegrityError:
+            pass
+
+        insertadas, rechazos = 0, []
+        for linea, fila in filas:
+            try:
+                with conn.begin_nested():
+                    conn.execute(INSERT_CIUDADANOS, dict(zip(self.CAMPOS, fila)))
+                insertadas += 1
+            except IntegrityError as e:
+                rechazos.append({"linea": linea, "motivo": f"Rechazado por la base de datos: {e.orig}", "registro": dict(zip(self.CAMPOS, fila))})
+        return insertadas, rechazos
+
+    def importar_lote(self, conn, lineas):
+        """Procesar un lote de líneas sin confirmar la transacción; devuelve los rechazos"""
+        registros, rechazos = self.parsear(lineas)
+        validas, rechazos_validacion = self.validar(registros)
+        filas, rechazos_duplicados = self.deduplicar(conn, validas)
+        procesados = len(registros) + len(rechazos)
+
+        insertadas, rechazos_insercion = self.insertar(conn, filas) if filas else (0, [])
+        if insertadas:
+            # Un evento de auditoría por lote en lugar de uno por ciudadano
+            conn.execute(text('''
+                INSERT INTO security_logs (usuario_id, accion, descripcion)
+                VALUES (NULL, 'USER_BULK_IMPORT', :descripcion)
+            '''), {"descripcion": f"{insertadas} ciudadanos importados (líneas hasta {self.linea})"})
+
+        rechazos += rechazos_validacion + rechazos_duplicados + rechazos_insercion
+        rechazos.sort(key=lambda r: r["linea"])
+        self.procesados += procesados  # Solo si el lote llegó hasta aquí
+        self.insertados += insertadas
+        self.rechazados += len(rechazos)
+        return rechazos
+
+    def resumen(self):
+        elapsed = time.perf_counter() - self.inicio
+        return {
+            "procesados": self.procesados,
+            "insertados": self.insertados,
+            "rechazados": self.rechazados,
+            "segundos": round(elapsed, 2),
+            "filas_por_segundo": round(self.procesados / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+def _fecha_valida(valor):
+    try:
+        date.fromisoformat(valor)
+        return True
+    except ValueError:
+        return False
+
+async def _lineas_en_lotes(request: Request, batch_size):
+    """Leer el cuerpo de la petición en streaming y agrupar las líneas en lotes"""
+    pendiente = b""
+    lote = []
+    primero = True
+    async for chunk in request.stream():
+        if primero:
+            chunk = chunk.removeprefix(b"\xef\xbb\xbf")  # BOM de UTF-8
+            primero = False
+        pendiente += chunk
+        *completas, pendiente = pendiente.split(b"\n")
+        for linea in completas:
+            lote.append(linea.decode("utf-8", errors="replace"))
+            if len(lote) >= batch_size:
+                yield lote
+                lote = []
+    if pendiente:
+        lote.append(pendiente.decode("utf-8", errors="replace"))
+    if lote:
+        yield lote
+
+@router.post("/importar")
+async def importar_ciudadanos(request: Request, formato: Optional[str] = None):
+    """
+    Importación masiva (CSV con encabezado o NDJSON). El cuerpo se lee en
+    streaming y se inserta lote a lote; los rechazos quedan en un archivo NDJSON
+    del blob store que se descarga desde /importar/rechazos/{clave}
+    """
+    if formato is None:
+        content_type = request.headers.get("content-type", "")
+        formato = "ndjson" if "ndjson" in content_type or "jsonlines" in content_type else "csv"
+    try:
+        importer = CiudadanoImporter(formato)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    muestra = []
+    error = None
+    with rechazos_store.writer() as rechazos_file:
+        async for lineas in _lineas_en_lotes(request, IMPORT_BATCH_SIZE):
+            try:
+                # Una transacción por lote
+                rechazos = await db.run(importer.importar_lote, lineas)
+            except Exception as e:
+                # Los lotes anteriores ya están confirmados: responder con el resumen parcial
+                error = f"Importación interrumpida en la línea {importer.linea}: {e}"
+                break
+            for rechazo in rechazos:
+                rechazos_file.write((json.dumps(rechazo, ensure_ascii=False, default=str) + "\n").encode())
+            muestra.extend(rechazos[:IMPORT_REJECT_SAMPLE - len(muestra)])
+        rechazos_key = rechazos_file.commit() if importer.rechazados else None
+
+    resultado = {
+        **importer.resumen(),
+        "rechazos_key": rechazos_key,
+        "muestra_rechazos": muestra,
+    }
+    if error:
+        return JSONResponse(status_code=500, content={**resultado, "error": error})
+    return resultado
+
+@router.get("/importar/rechazos/{key}")
+async def descargar_rechazos(key: str):
+    """Archivo NDJSON con las filas rechazadas de una importación"""
+    try:
+        path = rechazos_store.path(key)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Archivo de rechazos no encontrado")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Archivo de rechazos no encontrado o expirado")
+    return FileResponse(path, media_type="application/x-ndjson", filename="rechazos.ndjson")
+
+def _filtros_listado(tipo_identificacion, sector, despues_de):
+    """Cláusula WHERE del listado por keyset (id > cursor) y sus parámetros"""
+    condiciones, params = ["id > :despues_de"], {"despues_de": despues_de}
+    if tipo_identificacion:
+        condiciones.append("tipo_identificacion = :tipo_identificacion")
+        params["tipo_identificacion"] = tipo_identificacion.upper()
+    if sector:
+        if sector not in SECTORES:
+            raise HTTPException(status_code=400, detail=f"Sector desconocido: {sector}")
+        condiciones.append("sector = :sector")
+        params["sector"] = sector
+    return " AND ".join(condiciones), params
+
+def _ciudadano_dict(row):
+    return {
+        "id": row[0],
+        "tipo_identificacion": row[1],
+        "numero_identificacion": row[2],
+        "nombres": row[3],
+        "apellidos": row[4],
+        "email": row[5],
+        "fecha_nacimiento": row[6],
+        "sector": row[7],
+    }
+
+@router.get("/")
+async def listar_ciudadanos(
+    despues_de: int = Query(0, ge=0, description="Cursor: id del último ciudadano de la página anterior"),
+    limite: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    tipo_identificacion: Optional[str] = None,
+    sector: Optional[str] = None,
+):
+    """Listado paginado por keyset sobre id: cada página cuesta lo mismo sin importar la posición"""
+    where, params = _filtros_listado(tipo_identificacion, sector, despues_de)
+    rows = await db.fetchall(
+        f"SELECT {COLUMNAS_LISTADO} FROM usuarios WHERE {where} ORDER BY id LIMIT :limite",
+        {**params, "limite": limite + 1}
+    )
+    items = [_ciudadano_dict(row) for row in rows[:limite]]
+    return {
+        "items": items,
+        # None cuando no hay más páginas
+        "siguiente": items[-1]["id"] if len(rows) > limite else None,
+    }
+
+@router.get("/exportar")
+async def exportar_ciudadanos(tipo_identificacion: Optional[str] = None, sector: Optional[str] = None):
+    """Exportación completa en NDJSON, leída por bloques de id para usar memoria constante"""
+    # Validar los filtros antes de empezar a transmitir
+    _filtros_listado(tipo_identificacion, sector, 0)
+
+    async def lineas():
+        cursor = 0
+        while True:
+            where, params = _filtros_listado(tipo_identificacion, sector, cursor)
+            rows = await db.fetchall(
+                f"SELECT {COLUMNAS_LISTADO} FROM usuarios WHERE {where} ORDER BY id LIMIT :limite",
+                {**params, "limite": EXPORT_CHUNK_SIZE}
+            )
+            if not rows:
+                return
+            yield "".join(json.dumps(_ciudadano_dict(row), ensure_ascii=False) + "\n" for row in rows)
+            cursor = rows[-1][0]
+
+    return StreamingResponse(
+        lineas(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=ciudadanos.ndjson"}
+    )
+
 
 @router.get("/{dui}")
-async def get_ciudadano(dui: str, conn: sqlite3.Connection = Depends(get_db)):
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT id, dui, nombres, apellidos, email, fecha_nacimiento FROM usuarios WHERE dui = ?",
-        (dui,)
+async def get_ciudadano(dui: str):
+    usuario = await db.fetchone(
+        "SELECT id, numero_identificacion, nombres, apellidos, email, fecha_nacimiento FROM usuarios WHERE numero_identificacion = :numero",
+        {"numero": dui}
     )
-    usuario = cursor.fetchone()
     
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
@@ -1,23 +1,14 @@
 # app/api/routes/drones.py
-from fastapi import APIRouter, Depends
-import sqlite3
+from fastapi import APIRouter
+from app.core.database import db
 
 router = APIRouter()
 
-def get_db():
-    conn = sqlite3.connect("idn_sv.db")
-    try:
-        yield conn
-    finally:
-        conn.close()
-
 @router.get("/")
-async def get_drones(conn: sqlite3.Connection = Depends(get_db)):
-    cursor = conn.cursor()
-    cursor.execute(
+async def get_drones():
+    drones = await db.fetchall(
         "SELECT id, nombre, estado, ubicacion_lat, ubicacion_lng, bateria FROM drones"
     )
-    drones = cursor.fetchall()
     
     return [
         {
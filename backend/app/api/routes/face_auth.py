@@ -2,10 +2,17 @@
 import cv2
 import face_recognition
 import numpy as np
-import sqlite3
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Header, Request
+from typing import Optional
+from app.core.audit import audit_log, audit_lifespan
+from app.core.blob_store import blob_store
+from app.core.config import settings
+from app.core.database import db
+from app.core.dedup import submit_once, dedup_key_for, existing_result
+from sqlalchemy import text
+from app.tasks.image_tasks import process_face_recognition
 
-router = APIRouter()
+router = APIRouter(lifespan=audit_lifespan)
 
 class FaceAuthService:
     def __init__(self):
@@ -15,18 +22,14 @@ class FaceAuthService:
     
     def load_faces_from_db(self):
         """Cargar rostros conocidos desde la base de datos"""
-        conn = sqlite3.connect("idn_sv.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT usuario_id, face_encoding FROM face_profiles")
-        faces = cursor.fetchall()
+        with db.connection() as conn:
+            faces = conn.execute(text("SELECT usuario_id, face_encoding FROM face_profiles")).fetchall()
         
         for face in faces:
             # Convertir string de vuelta a numpy array
             encoding = np.fromstring(face[1], sep=',')
             self.known_face_encodings.append(encoding)
             self.known_face_ids.append(face[0])
-        
-        conn.close()
     
     def decode_image(self, image_data: bytes):
         """Decodificar bytes a imagen y validar"""
@@ -54,16 +57,17 @@ class FaceAuthService:
             return False
         
         # Guardar en base de datos
-        conn = sqlite3.connect("idn_sv.db")
-        cursor = conn.cursor()
-        
         encoding_str = ','.join(map(str, face_encodings[0]))
-        cursor.execute(
-            "INSERT OR REPLACE INTO face_profiles (usuario_id, face_encoding) VALUES (?, ?)",
-            (user_id, encoding_str)
-        )
-        conn.commit()
-        conn.close()
+        with db.connection() as conn:
+            # Upsert en lugar de INSERT OR REPLACE: REPLACE borra sin disparar triggers
+            conn.execute(
+                text("""
+                INSERT INTO face_profiles (usuario_id, face_encoding) VALUES (:usuario_id, :face_encoding)
+                ON CONFLICT (usuario_id) DO UPDATE SET face_encoding = excluded.face_encoding
+                """),
+                {"usuario_id": user_id, "face_encoding": encoding_str}
+            )
+            conn.commit()
         
         # Actualizar cache
         self.known_face_encodings.append(face_encodings[0])
@@ -95,23 +99,57 @@ class FaceAuthService:
 face_service = FaceAuthService()
 
 @router.post("/register-face")
-async def register_face(user_id: int, file: UploadFile = File(...)):
+async def register_face(request: Request, user_id: int, file: UploadFile = File(...)):
     """Registrar rostro de usuario"""
     image_data = await file.read()
     success = face_service.register_face(image_data, user_id)
     
     if success:
+        await audit_log.log_committed(
+            "FACE_REGISTER",
+            f"Perfil facial registrado para el usuario {user_id}",
+            usuario_id=user_id,
+            ip_address=request.client.host if request.client else None
+        )
         return {"message": "Rostro registrado exitosamente"}
     else:
         raise HTTPException(status_code=400, detail="No se detectó ningún rostro")
 
 @router.post("/verify-face")
-async def verify_face(file: UploadFile = File(...)):
+async def verify_face(request: Request, file: UploadFile = File(...)):
     """Verificar rostro"""
     image_data = await file.read()
     user_id = face_service.verify_face(image_data)
     
+    await audit_log.log(
+        "FACE_VERIFY" if user_id else "FACE_VERIFY_FAILED",
+        "Verificación facial",
+        usuario_id=user_id,
+        ip_address=request.client.host if request.client else None
+    )
+    
     if user_id:
         return {"authenticated": True, "user_id": user_id}
     else:
         return {"authenticated": False}
+
+@router.post("/process-face")
+async def process_face(file: UploadFile = File(...), idempotency_key: Optional[str] = Header(None)):
+    """Encolar reconocimiento facial asíncrono"""
+    # Imágenes pequeñas viajan en el mensaje; las grandes se desbordan al blob store
+    payload, payload_hash = await blob_store.read_payload(file, settings.INLINE_PAYLOAD_MAX_BYTES)
+    task_id, deduplicated = submit_once(
+        process_face_recognition,
+        (payload, file.filename),
+        dedup_key_for(payload_hash, idempotency_key)
+    )
+    
+    response = {
+        "message": "Imagen ya enviada anteriormente" if deduplicated else "Imagen en procesamiento",
+        "task_id": task_id,
+        "status_url": f"/api/v1/tasks/{task_id}/status"
+    }
+    if deduplicated:
+        response["deduplicated"] = True
+        response["result"] = existing_result(task_id)
+    return response
@@ -1,8 +1,30 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
 from app.core.celery import celery_app
+from app.core.progress import progress_broker, TERMINAL_STATES
+from app.core.warmup import warm_workers
+from app.core.audit import audit_log
+from app.core.database import db
+from app.core.serialization import to_jsonable, json_default
+import asyncio
+import json
+import time
 
 router = APIRouter()
 
+HEARTBEAT_SECONDS = 15
+MGET_CHUNK_SIZE = 500
+MAX_BATCH_TASKS = 10000
+
+class TaskStatusBatchRequest(BaseModel):
+    task_ids: List[str] = Field(..., max_length=MAX_BATCH_TASKS)
+    since: Optional[float] = None  # Cursor devuelto por la consulta anterior
+    only_finished: bool = False
+    include_results: bool = False
+
 @router.get("/tasks/{task_id}/status")
 async def get_task_status(task_id: str):
     """
@@ -18,9 +40,156 @@ async def get_task_status(task_id: str):
         
         # Si la tarea está lista, incluir resultado
         if task_result.ready():
-            response["result"] = task_result.result
+            response["result"] = to_jsonable(task_result.result)
         
         return response
         
     except Exception as e:
-        raise HTTPException(500, f"Error consultando tarea: {str(e)}")
\ No newline at end of file
+        raise HTTPException(500, f"Error consultando tarea: {str(e)}")
+
+def _fetch_task_metas(task_ids):
+    """Leer los metadatos de muchas tareas con MGET en un pipeline de Redis"""
+    backend = celery_app.backend
+    if not (hasattr(backend, "client") and hasattr(backend, "get_key_for_task")):
+        # Backend sin acceso directo (p. ej. modo eager): una lectura por tarea
+        metas = []
+        for task_id in task_ids:
+            task_result = celery_app.AsyncResult(task_id)
+            metas.append({"status": task_result.status, "result": task_result.info, "date_done": task_result.date_done})
+        return metas
+
+    pipeline = backend.client.pipeline(transaction=False)
+    for start in range(0, len(task_ids), MGET_CHUNK_SIZE):
+        chunk = task_ids[start:start + MGET_CHUNK_SIZE]
+        pipeline.mget([backend.get_key_for_task(task_id) for task_id in chunk])
+
+    metas = []
+    for values in pipeline.execute():
+        for value in values:
+            metas.append(backend.decode_result(value) if value else {"status": "PENDING", "result": None})
+    return metas
+
+def _updated_at(meta):
+    """Marca de tiempo (epoch) del último cambio conocido de la tarea"""
+    date_done = meta.get("date_done")
+    if date_done:
+        if isinstance(date_done, str):
+            date_done = datetime.fromisoformat(date_done)
+        return date_done.timestamp()
+    result = meta.get("result")
+    if isinstance(result, dict):
+        return result.get("updated_at")
+    return None
+
+def _compact_record(task_id, meta, include_results):
+    record = {"id": task_id, "status": meta["status"]}
+    result = meta.get("result")
+    if meta["status"] == "PROGRESS" and isinstance(result, dict):
+        record["progress"] = [result.get("current"), result.get("total")]
+    elif include_results and meta["status"] in TERMINAL_STATES:
+        record["result"] = {"error": str(result)} if isinstance(result, BaseException) else to_jsonable(result)
+    return record
+
+@router.post("/tasks/status")
+async def get_tasks_status(batch: TaskStatusBatchRequest):
+    """
+    Estado de muchas tareas en una sola consulta
+    """
+    try:
+        # El cursor se toma antes de leer para no perder cambios concurrentes
+        cursor = time.time()
+        metas = _fetch_task_metas(batch.task_ids)
+
+        records = []
+        for task_id, meta in zip(batch.task_ids, metas):
+            if batch.only_finished and meta["status"] not in TERMINAL_STATES:
+                continue
+            if batch.since is not None:
+                updated_at = _updated_at(meta)
+                if updated_at is None or updated_at < batch.since:
+                    continue
+            records.append(_compact_record(task_id, meta, batch.include_results))
+
+        return {"cursor": cursor, "count": len(records), "tasks": records}
+
+    except Exception as e:
+        raise HTTPException(500, f"Error consultando tareas: {str(e)}")
+
+@router.get("/workers/ready")
+async def workers_ready():
+    """
+    Disponibilidad: 503 hasta que exista al menos un proceso worker precargado
+    """
+    workers = warm_workers()
+    if not workers:
+        raise HTTPException(503, "Ningún worker precargado todavía")
+    return {"ready": True, "warm_processes": len(workers), "workers": workers}
+
+@router.get("/db/pool")
+async def db_pool_stats():
+    """Salud del pool del motor de base de datos: conexiones en uso, desbordes y espera para obtener una"""
+    return db.stats()
+
+@router.get("/audit/stats")
+async def audit_stats():
+    """Profundidad de la cola de auditoría y latencia de escritura por lote"""
+    return audit_log.stats()
+
+def _current_event(task_id):
+    """Estado actual desde el backend de resultados (una sola lectura por cliente)"""
+    task_result = celery_app.AsyncResult(task_id)
+    info = task_result.info
+    if isinstance(info, BaseException):
+        info = {"error": str(info)}
+    return {"task_id": task_id, "state": task_result.status, "meta": info}
+
+async def _task_events(task_id):
+    """Eventos de progreso de una tarea hasta que llegue a un estado final"""
+    async with progress_broker.subscribe(task_id) as queue:
+        # Suscribirse antes de leer el estado para no perder transiciones
+        event = _current_event(task_id)
+        yield event
+        if event["state"] in TERMINAL_STATES:
+            return
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield None  # Latido para mantener viva la conexión
+                continue
+            yield event
+            if event["state"] in TERMINAL_STATES:
+                return
+
+@router.get("/tasks/{task_id}/events")
+async def stream_task_events(task_id: str):
+    """
+    Progreso de una tarea en tiempo real (Server-Sent Events)
+    """
+    async def event_stream():
+        async for event in _task_events(task_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {event['state'].lower()}\ndata: {json.dumps(event, default=json_default)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/tasks/{task_id}/ws")
+async def task_events_websocket(websocket: WebSocket, task_id: str):
+    """
+    Progreso de una tarea en tiempo real (WebSocket)
+    """
+    await websocket.accept()
+    try:
+        async for event in _task_events(task_id):
+            if event is not None:
+                await websocket.send_text(json.dumps(event, default=json_default))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
@@ -0,0 +1,182 @@
+# app/api/routes/uploads.py
+from fastapi import APIRouter, HTTPException, Request, Header
+from pydantic import BaseModel, Field
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from app.core.blob_store import blob_store
+from app.core.config import settings
+from app.core.dedup import submit_once, dedup_key_for
+from app.core.redis import redis_client
+from app.tasks.audio_tasks import process_audio_task
+import hashlib
+import os
+import uuid
+
+router = APIRouter()
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a')
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv')
+RECOMMENDED_CHUNK_SIZE = 4 * 1024 * 1024
+MAX_CHUNK_SIZE = 16 * 1024 * 1024
+MAX_UPLOAD_SIZE = 4 * 1024 * 1024 * 1024
+
+class UploadCreate(BaseModel):
+    filename: str
+    size: int = Field(..., gt=0, le=MAX_UPLOAD_SIZE)
+    sha256: Optional[str] = None  # Hash del archivo completo, verificado al finalizar
+
+def _session_key(upload_id):
+    return f"upload:{upload_id}"
+
+def _chunks_key(upload_id):
+    return f"upload:{upload_id}:chunks"
+
+def _get_session(upload_id):
+    if not upload_id.isalnum():
+        raise HTTPException(status_code=404, detail="Subida no encontrada")
+    session = redis_client.hgetall(_session_key(upload_id))
+    if not session:
+        raise HTTPException(status_code=404, detail="Subida no encontrada o expirada")
+    return session
+
+def _received_ranges(upload_id):
+    """Rangos [inicio, fin) recibidos, fusionados y ordenados"""
+    chunks = redis_client.hgetall(_chunks_key(upload_id))
+    ranges = sorted((int(offset), int(offset) + int(value.split(":")[0])) for offset, value in chunks.items())
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def _missing_ranges(received, size):
+    missing, position = [], 0
+    for start, end in received:
+        if start > position:
+            missing.append([position, start])
+        position = max(position, end)
+    if position < size:
+        missing.append([position, size])
+    return missing
+
+async def _read_chunk(request: Request):
+    """Cuerpo del bloque con tope de tamaño, sin leer más de MAX_CHUNK_SIZE bytes"""
+    too_large = HTTPException(status_code=413, detail=f"El bloque debe tener entre 1 y {MAX_CHUNK_SIZE} bytes")
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > MAX_CHUNK_SIZE:
+        raise too_large
+
+    data = bytearray()
+    async for part in request.stream():
+        data += part
+        if len(data) > MAX_CHUNK_SIZE:
+            raise too_large
+    if not data:
+        raise too_large
+    return bytes(data)
+
+def _touch(upload_id):
+    redis_client.expire(_session_key(upload_id), settings.BLOB_TTL_SECONDS)
+    redis_client.expire(_chunks_key(upload_id), settings.BLOB_TTL_SECONDS)
+
+@router.post("/uploads")
+async def create_upload(upload: UploadCreate):
+    """Crear una sesión de subida por bloques (reanudable)"""
+    if not upload.filename.lower().endswith(AUDIO_EXTENSIONS + VIDEO_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Formato de archivo no soportado")
+
+    upload_id = uuid.uuid4().hex
+    redis_client.hset(_session_key(upload_id), mapping={
+        "filename": upload.filename,
+        "size": upload.size,
+        "sha256": upload.sha256 or "",
+    })
+    _touch(upload_id)
+
+    return {
+        "upload_id": upload_id,
+        "chunk_size": RECOMMENDED_CHUNK_SIZE,
+        "upload_url": f"/api/v1/uploads/{upload_id}/chunks"
+    }
+
+@router.put("/uploads/{upload_id}/chunks")
+async def upload_chunk(
+    upload_id: str,
+    offset: int,
+    request: Request,
+    x_chunk_sha256: str = Header(...)
+):
+    """Recibir un bloque en su offset; se verifica su SHA-256 antes de aceptarlo"""
+    session = _get_session(upload_id)
+    size = int(session["size"])
+
+    data = await _read_chunk(request)
+    if offset < 0 or offset + len(data) > size:
+        raise HTTPException(status_code=416, detail="Bloque fuera del tamaño declarado")
+
+    checksum = hashlib.sha256(data).hexdigest()
+    if checksum != x_chunk_sha256.lower():
+        raise HTTPException(status_code=422, detail="Checksum del bloque no coincide; reenvíelo")
+
+    await run_in_threadpool(blob_store.write_at, upload_id, offset, data)
+    redis_client.hset(_chunks_key(upload_id), offset, f"{len(data)}:{checksum}")
+    _touch(upload_id)
+
+    received = _received_ranges(upload_id)
+    return {
+        "offset": offset,
+        "length": len(data),
+        "received_bytes": sum(end - start for start, end in received)
+    }
+
+@router.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    """Estado de la subida: qué rangos faltan para reanudarla"""
+    session = _get_session(upload_id)
+    size = int(session["size"])
+    received = _received_ranges(upload_id)
+    return {
+        "upload_id": upload_id,
+        "filename": session["filename"],
+        "size": size,
+        "received_bytes": sum(end - start for start, end in received),
+        "missing_ranges": _missing_ranges(received, size)
+    }
+
+@router.post("/uploads/{upload_id}/finalize")
+async def finalize_upload(upload_id: str, process: bool = True):
+    """Cerrar la subida: el archivo pasa al blob store (sin copiarlo) y, si es audio, se procesa"""
+    session = _get_session(upload_id)
+    size = int(session["size"])
+
+    missing = _missing_ranges(_received_ranges(upload_id), size)
+    if missing:
+        raise HTTPException(status_code=409, detail={"message": "Faltan bloques", "missing_ranges": missing})
+
+    path = blob_store.partial_path(upload_id)
+    if os.path.getsize(path) != size:
+        raise HTTPException(status_code=409, detail="Tamaño del archivo distinto al declarado")
+
+    # Verificar antes de tocar el blob store: un blob con el mismo contenido
+    # puede estar en uso, y la sesión se conserva para reenviar bloques
+    digest = await run_in_threadpool(blob_store.file_sha256, path)
+    if session["sha256"] and session["sha256"].lower() != digest:
+        raise HTTPException(status_code=422, detail="El hash del archivo completo no coincide; reenvíe los bloques")
+
+    blob_key = await run_in_threadpool(blob_store.adopt, path, digest)
+    redis_client.delete(_session_key(upload_id), _chunks_key(upload_id))
+
+    response = {"upload_id": upload_id, "blob_key": blob_key, "size": size}
+
+    filename = session["filename"]
+    if process and filename.lower().endswith(AUDIO_EXTENSIONS):
+        task_id, deduplicated = submit_once(process_audio_task, (blob_key, filename), dedup_key_for(blob_key))
+        response.update({
+            "task_id": task_id,
+            "deduplicated": deduplicated,
+            "status_url": f"/api/v1/tasks/{task_id}/status"
+        })
+
+    return response
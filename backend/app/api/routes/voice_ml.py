@@ -1,36 +1,433 @@
 # app/api/routes/voice_ml.py
-import speech_recognition as sr
 import librosa
 import numpy as np
+import soundfile as sf
 import hashlib
+import io
+import os
+import struct
+import tempfile
+import threading
+import time
+from functools import lru_cache
 from scipy import spatial
+from app.core.database import db
+from sqlalchemy import text
+
+TARGET_SAMPLE_RATE = 22050
+MAX_DURATION = 3.0
+TRANSCRIPTION_LANGUAGE = "es-SV"
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MFCC = 13
+N_MELS = 128
+VOICE_INDEX_TTL_SECONDS = 300  # Inscripciones de otros procesos se ven tras recargar
+
+@lru_cache(maxsize=8)
+def get_mel_basis(sample_rate, n_fft=N_FFT, n_mels=N_MELS):
+    """Banco de filtros mel, calculado una vez por frecuencia de muestreo"""
+    basis = librosa.filters.mel(sr=sample_rate, n_fft=n_fft, n_mels=n_mels)
+    basis.flags.writeable = False
+    return basis
+
+@lru_cache(maxsize=256)
+def get_chroma_basis(sample_rate, n_fft=N_FFT, tuning=0.0):
+    """Banco de filtros croma por frecuencia de muestreo y afinación estimada"""
+    basis = librosa.filters.chroma(sr=sample_rate, n_fft=n_fft, tuning=tuning)
+    basis.flags.writeable = False
+    return basis
+
+@lru_cache(maxsize=8)
+def get_fft_frequencies(sample_rate, n_fft=N_FFT):
+    freqs = librosa.fft_frequencies(sr=sample_rate, n_fft=n_fft)
+    freqs.flags.writeable = False
+    return freqs
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+def _wav_samples(view, offset, n_frames, channels, fmt_tag, bits):
+    """Interpretar el bloque de datos PCM como arreglo float32 en [-1, 1)"""
+    count = n_frames * channels
+    if fmt_tag == WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+        samples = np.frombuffer(view, dtype=f"<f{bits // 8}", count=count, offset=offset)
+        return samples.astype(np.float32, copy=False)
+    if fmt_tag != WAVE_FORMAT_PCM:
+        raise ValueError(f"Formato WAV no soportado: {fmt_tag:#06x}")
+
+    if bits == 8:
+        samples = np.frombuffer(view, dtype=np.uint8, count=count, offset=offset)
+        return (samples.astype(np.float32) - 128.0) / 128.0
+    if bits in (16, 32):
+        samples = np.frombuffer(view, dtype=f"<i{bits // 8}", count=count, offset=offset)
+        return samples.astype(np.float32) / float(2 ** (bits - 1))
+    if bits == 24:
+        raw = np.frombuffer(view, dtype=np.uint8, count=count * 3, offset=offset).reshape(-1, 3)
+        samples = (raw[:, 0].astype(np.int32)
+                   | (raw[:, 1].astype(np.int32) << 8)
+                   | (raw[:, 2].astype(np.int8).astype(np.int32) << 16))
+        return samples.astype(np.float32) / float(2 ** 23)
+    raise ValueError(f"Profundidad de bits no soportada: {bits}")
+
+def decode_wav(data, duration=None):
+    """Decodificar WAV/PCM en memoria sin copiar el buffer (None si no es WAV)"""
+    view = memoryview(data).cast("B")
+    if len(view) < 12 or view[:4] != b"RIFF" or view[8:12] != b"WAVE":
+        return None
+
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(view):
+        chunk_id = view[pos:pos + 4].tobytes()
+        size = struct.unpack_from("<I", view, pos + 4)[0]
+        body = pos + 8
+
+        if chunk_id == b"fmt ":
+            fmt_tag, channels, sample_rate = struct.unpack_from("<HHI", view, body)
+            bits = struct.unpack_from("<H", view, body + 14)[0]
+            if fmt_tag == WAVE_FORMAT_EXTENSIBLE and size >= 40:
+                fmt_tag = struct.unpack_from("<H", view, body + 24)[0]
+            fmt = (fmt_tag, channels, sample_rate, bits)
+
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV sin bloque 'fmt '")
+            fmt_tag, channels, sample_rate, bits = fmt
+
+            # Los grabadores en streaming dejan el tamaño en 0xFFFFFFFF
+            size = min(size, len(view) - body)
+            n_frames = size // (channels * (bits // 8))
+            if duration is not None:
+                n_frames = min(n_frames, int(duration * sample_rate))
+
+            samples = _wav_samples(view, body, n_frames, channels, fmt_tag, bits)
+            if channels > 1:
+                samples = samples.reshape(-1, channels).mean(axis=1)
+            return samples, sample_rate
+
+        pos = body + size + (size & 1)
+
+    raise ValueError("WAV sin bloque 'data'")
+
+def _load_spilled(data, sample_rate, duration):
+    """Decodificar desde un archivo temporal (formatos que soundfile no reconoce)"""
+    with tempfile.NamedTemporaryFile(suffix=".audio", delete=False) as f:
+        f.write(data)
+    try:
+        return librosa.load(f.name, sr=sample_rate, duration=duration)
+    finally:
+        os.unlink(f.name)
+
+def load_audio(source, sample_rate=TARGET_SAMPLE_RATE, duration=MAX_DURATION):
+    """Cargar audio desde ruta, bytes o buffer; remuestrea solo si hace falta"""
+    if isinstance(source, (str, os.PathLike)):
+        return librosa.load(source, sr=sample_rate, duration=duration)
+
+    if hasattr(source, "read"):
+        source = source.read()
+
+    decoded = decode_wav(source, duration=duration)
+    if decoded is None:
+        try:
+            # MP3/FLAC/OGG: soundfile decodifica desde memoria
+            return librosa.load(io.BytesIO(source), sr=sample_rate, duration=duration)
+        except sf.SoundFileError:
+            # M4A/AAC: librosa solo recurre a audioread (ffmpeg) con rutas
+            return _load_spilled(source, sample_rate, duration)
+
+    y, native_rate = decoded
+    if native_rate != sample_rate:
+        y = librosa.resample(y, orig_sr=native_rate, target_sr=sample_rate)
+    return y, sample_rate
+
+class VoiceActivityDetector:
+    """VAD por energía y cruces por cero para recortar silencios"""
+
+    def __init__(self, frame_seconds=0.025, hop_seconds=0.010, margin_seconds=0.1,
+                 min_speech_seconds=0.5, energy_margin_db=10.0, floor_db=-55.0,
+                 speech_db=-40.0):
+        self.frame_seconds = frame_seconds
+        self.hop_seconds = hop_seconds
+        self.margin_seconds = margin_seconds
+        self.min_speech_seconds = min_speech_seconds
+        self.energy_margin_db = energy_margin_db
+        self.floor_db = floor_db
+        self.speech_db = speech_db
+
+    def frame_activity(self, y, sample_rate):
+        """Máscara de tramas con voz y tamaño de salto en muestras"""
+        frame = max(1, int(self.frame_seconds * sample_rate))
+        hop = max(1, int(self.hop_seconds * sample_rate))
+        if len(y) < frame:
+            return np.zeros(0, dtype=bool), hop
+
+        # Vista sin copia de las tramas solapadas
+        frames = np.lib.stride_tricks.sliding_window_view(y, frame)[::hop]
+        energy_db = 10 * np.log10(np.mean(np.square(frames, dtype=np.float32), axis=1) + 1e-10)
+        zcr = np.mean(np.signbit(frames[:, 1:]) != np.signbit(frames[:, :-1]), axis=1)
+
+        noise_floor = np.percentile(energy_db, 10)
+        if np.max(energy_db) - noise_floor >= self.energy_margin_db:
+            threshold = max(noise_floor + self.energy_margin_db, self.floor_db)
+        else:
+            # Clip sin rango dinámico (todo voz o todo ruido): decide el nivel absoluto
+            threshold = self.speech_db
+
+        # Sonoras: energía alta. Fricativas: energía media con muchos cruces por cero
+        voiced = energy_db > threshold
+        unvoiced = (energy_db > threshold - self.energy_margin_db / 2) & (zcr > 0.25)
+        active = voiced | unvoiced
+
+        # Suavizado por mayoría para ignorar chasquidos aislados
+        smoothed = np.convolve(active.astype(np.int8), np.ones(5, dtype=np.int8), mode="same") >= 3
+        return smoothed, hop
+
+    def trim(self, y, sample_rate):
+        """Recortar silencio inicial/final; (None, info) si hay muy poca voz"""
+        active, hop = self.frame_activity(y, sample_rate)
+        speech_seconds = float(np.count_nonzero(active) * hop / sample_rate)
+        info = {
+            "total_seconds": len(y) / sample_rate,
+            "speech_seconds": speech_seconds,
+        }
+
+        if speech_seconds < self.min_speech_seconds:
+            return None, info
+
+        indices = np.flatnonzero(active)
+        margin = int(self.margin_seconds * sample_rate)
+        frame = max(1, int(self.frame_seconds * sample_rate))
+        start = max(0, int(indices[0]) * hop - margin)
+        end = min(len(y), int(indices[-1]) * hop + frame + margin)
+
+        info["start_seconds"] = start / sample_rate
+        info["end_seconds"] = end / sample_rate
+        return y[start:end], info
+
+    def segments(self, y, sample_rate, max_window_seconds=15.0, min_silence_seconds=0.3):
+        """Ventanas (inicio, fin) en muestras, cortadas en silencios y de duración acotada"""
+        active, hop = self.frame_activity(y, sample_rate)
+        if not active.any():
+            return []
+
+        # Tramos de voz [inicio, fin) en tramas
+        edges = np.flatnonzero(np.diff(np.concatenate([[0], active.astype(np.int8), [0]])))
+        min_gap = max(1, int(min_silence_seconds / self.hop_seconds))
+        max_frames = max(1, int(max_window_seconds / self.hop_seconds))
+
+        # Unir tramos separados por pausas cortas (no se corta a mitad de palabra)
+        regions = []
+        for start, end in zip(edges[0::2].tolist(), edges[1::2].tolist()):
+            if regions and start - regions[-1][1] < min_gap:
+                regions[-1][1] = end
+            else:
+                regions.append([start, end])
+
+        # Empaquetar tramos consecutivos en ventanas de hasta max_window_seconds
+        windows = []
+        for start, end in regions:
+            while end - start > max_frames:
+                windows.append([start, start + max_frames])
+                start += max_frames
+            if windows and end - windows[-1][0] <= max_frames:
+                windows[-1][1] = end
+            else:
+                windows.append([start, end])
+
+        frame = max(1, int(self.frame_seconds * sample_rate))
+        margin = int(self.margin_seconds * sample_rate)
+        return [
+            (max(0, start * hop - margin), min(len(y), (end - 1) * hop + frame + margin))
+            for start, end in windows
+        ]
+
+class VoiceFeaturePipeline:
+    """Calcula MFCC, centroide espectral y croma a partir de un único STFT"""
+
+    def __init__(self, n_fft=N_FFT, hop_length=HOP_LENGTH, n_mfcc=N_MFCC):
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mfcc = n_mfcc
+
+    def spectrogram(self, y):
+        """Espectrograma de magnitud y de potencia (un solo STFT)"""
+        magnitude = np.abs(librosa.stft(y, n_fft=self.n_fft, hop_length=self.hop_length))
+        return magnitude, magnitude ** 2
+
+    def mfcc(self, power, sample_rate):
+        mel = get_mel_basis(sample_rate, self.n_fft) @ power
+        return librosa.feature.mfcc(S=librosa.power_to_db(mel), n_mfcc=self.n_mfcc)
+
+    def spectral_centroid(self, magnitude, sample_rate):
+        return librosa.feature.spectral_centroid(
+            S=magnitude, sr=sample_rate, n_fft=self.n_fft,
+            freq=get_fft_frequencies(sample_rate, self.n_fft)
+        )
+
+    def chroma(self, power, sample_rate):
+        # La afinación tiene resolución de 0.01, así que el caché queda acotado
+        tuning = round(float(librosa.estimate_tuning(S=power, sr=sample_rate, bins_per_octave=12)), 2)
+        raw_chroma = get_chroma_basis(sample_rate, self.n_fft, tuning) @ power
+        return librosa.util.normalize(raw_chroma, norm=np.inf, axis=0)
+
+    def extract(self, y, sample_rate):
+        """Vector de características: media/desv. MFCC, centroide medio y croma medio"""
+        magnitude, power = self.spectrogram(y)
+
+        mfcc = self.mfcc(power, sample_rate)
+        spectral_centroid = self.spectral_centroid(magnitude, sample_rate)
+        chroma = self.chroma(power, sample_rate)
+
+        return np.concatenate([
+            np.mean(mfcc, axis=1),
+            np.std(mfcc, axis=1),
+            np.mean(spectral_centroid, axis=1),
+            np.mean(chroma, axis=1)
+        ])
+
+class VoiceIndex:
+    """Índice en memoria de vectores de voz normalizados (similitud coseno)"""
+
+    def __init__(self, initial_capacity=256):
+        self._lock = threading.Lock()
+        self._initial_capacity = initial_capacity
+        self._matrix = None  # float32 (capacidad, dim), filas normalizadas
+        self._ids = []       # usuario_id de cada fila
+        self._rows = {}      # usuario_id -> fila
+
+    def __len__(self):
+        return len(self._ids)
+
+    @staticmethod
+    def normalize(features):
+        """Convertir a float32 con norma L2 = 1 (None si el vector es nulo)"""
+        vector = np.asarray(features, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        if norm == 0 or not np.isfinite(norm):
+            return None
+        return vector / norm
+
+    def _ensure_capacity(self, dim):
+        if self._matrix is None:
+            self._matrix = np.zeros((self._initial_capacity, dim), dtype=np.float32)
+        elif self._matrix.shape[1] != dim:
+            raise ValueError(f"Dimensión {dim} distinta a la del índice ({self._matrix.shape[1]})")
+        elif len(self._ids) == self._matrix.shape[0]:
+            # Crecimiento geométrico: inscripción incremental en O(1) amortizado
+            grown = np.zeros((self._matrix.shape[0] * 2, dim), dtype=np.float32)
+            grown[:len(self._ids)] = self._matrix[:len(self._ids)]
+            self._matrix = grown
+
+    def add(self, usuario_id, features):
+        """Agregar o reemplazar el vector de un usuario"""
+        vector = self.normalize(features)
+        if vector is None:
+            return False
+
+        with self._lock:
+            row = self._rows.get(usuario_id)
+            if row is None:
+                self._ensure_capacity(vector.shape[0])
+                row = len(self._ids)
+                self._ids.append(usuario_id)
+                self._rows[usuario_id] = row
+            elif self._matrix.shape[1] != vector.shape[0]:
+                raise ValueError("Dimensión distinta a la del índice")
+            self._matrix[row] = vector
+        return True
+
+    def remove(self, usuario_id):
+        """Eliminar un usuario moviendo la última fila a su posición"""
+        with self._lock:
+            row = self._rows.pop(usuario_id, None)
+            if row is None:
+                return False
+            last = len(self._ids) - 1
+            if row != last:
+                last_id = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = last_id
+                self._rows[last_id] = row
+            self._ids.pop()
+        return True
+
+    def search(self, features, top_k=5, threshold=None):
+        """Buscar los usuarios más similares con un solo producto matriz-vector"""
+        query = self.normalize(features)
+        if query is None or top_k <= 0:
+            return []
+
+        with self._lock:
+            size = len(self._ids)
+            if size == 0:
+                return []
+            if query.shape[0] != self._matrix.shape[1]:
+                raise ValueError("Dimensión distinta a la del índice")
+
+            scores = self._matrix[:size] @ query
+            if top_k < size:
+                candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+            else:
+                candidates = np.arange(size)
+            candidates = candidates[np.argsort(-scores[candidates])]
+            ids = [self._ids[i] for i in candidates]
+
+        results = []
+        for usuario_id, score in zip(ids, scores[candidates]):
+            if threshold is not None and score < threshold:
+                break
+            results.append({"usuario_id": usuario_id, "similarity": float(score)})
+        return results
+
 
 class VoiceMLService:
     def __init__(self):
-        self.recognizer = sr.Recognizer()
+        self._recognizer = None
+        self.pipeline = VoiceFeaturePipeline()
+        self.vad = VoiceActivityDetector()
+        self.index = VoiceIndex()
+        self._index_loaded_at = None
+        self._index_lock = threading.Lock()
+
+    @property
+    def recognizer(self):
+        """Reconocedor de voz, importado solo cuando se necesita transcribir"""
+        if self._recognizer is None:
+            import speech_recognition
+            self._recognizer = speech_recognition.Recognizer()
+        return self._recognizer
     
-    def extract_voice_features(self, audio_path):
-        """Extraer características MFCC avanzadas"""
+    def extract_voice_features(self, audio):
+        """Extraer características MFCC avanzadas (ruta, bytes o buffer)"""
         try:
-            y, sr = librosa.load(audio_path, sr=22050, duration=3.0)
+            y, sr = load_audio(audio)
             
-            # Características avanzadas
-            mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
-            spectral_centroid = librosa.feature.spectral_centroid(y=y, sr=sr)
-            chroma = librosa.feature.chroma_stft(y=y, sr=sr)
+            # Recortar silencios antes del STFT y descartar clips sin voz suficiente
+            y, vad_info = self.vad.trim(y, sr)
+            if y is None:
+                print(f"Audio descartado: solo {vad_info['speech_seconds']:.2f}s de voz")
+                return None
             
-            features = np.concatenate([
-                np.mean(mfcc, axis=1),
-                np.std(mfcc, axis=1),
-                np.mean(spectral_centroid, axis=1),
-                np.mean(chroma, axis=1)
-            ])
+            # Características avanzadas (un solo STFT compartido)
+            features = self.pipeline.extract(y, sr)
             
             return features.tolist()
         except Exception as e:
             print(f"Error procesando audio: {e}")
             return None
     
+    def transcribe(self, y, sample_rate, language=TRANSCRIPTION_LANGUAGE):
+        """Transcribir un fragmento de audio (float32) con SpeechRecognition"""
+        import speech_recognition
+
+        pcm = (np.clip(y, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+        audio = speech_recognition.AudioData(pcm, sample_rate, 2)
+        try:
+            return self.recognizer.recognize_google(audio, language=language)
+        except speech_recognition.UnknownValueError:
+            return ""  # Fragmento sin habla reconocible
+    
     def create_voice_signature(self, features):
         """Crear firma vocal única"""
         if features is None:
@@ -44,4 +441,55 @@ class VoiceMLService:
             return False
         
         similarity = 1 - spatial.distance.cosine(features1, features2)
-        return similarity >= threshold  
\ No newline at end of file
+        return similarity >= threshold
+
+    def load_index_from_db(self):
+        """Cargar los vectores de voz inscritos desde la base de datos"""
+        with db.connection() as conn:
+            rows = conn.execute(text("SELECT usuario_id, vector FROM voice_embeddings")).fetchall()
+
+        index = VoiceIndex()
+        for usuario_id, blob in rows:
+            index.add(usuario_id, np.frombuffer(blob, dtype="<f4"))
+
+        self.index = index
+        self._index_loaded_at = time.monotonic()
+
+    def _refresh_index(self):
+        """Recargar el índice al primer uso y cada pocos minutos (como el índice de rostros)"""
+        with self._index_lock:
+            loaded_at = self._index_loaded_at
+            if loaded_at is None or time.monotonic() - loaded_at > VOICE_INDEX_TTL_SECONDS:
+                self.load_index_from_db()
+                return True
+        return False
+
+    def enroll_voice(self, usuario_id, features):
+        """Guardar el vector de voz de un usuario y agregarlo al índice"""
+        if features is None:
+            return False
+
+        vector = np.asarray(features, dtype="<f4")
+        with db.connection() as conn:
+            conn.execute(text('''
+                INSERT INTO voice_embeddings (usuario_id, dim, vector) VALUES (:usuario_id, :dim, :vector)
+                ON CONFLICT (usuario_id) DO UPDATE
+                SET dim = excluded.dim, vector = excluded.vector, updated_at = CURRENT_TIMESTAMP
+            '''), {"usuario_id": usuario_id, "dim": vector.shape[0], "vector": vector.tobytes()})
+            # Perfil de voz como en enroll_voices.py: cuenta en usuarios_voz (/system-stats)
+            conn.execute(text('''
+                INSERT INTO voice_profiles (usuario_id, voice_hash)
+                SELECT :usuario_id, :voice_hash WHERE NOT EXISTS (SELECT 1 FROM voice_profiles WHERE usuario_id = :usuario_id)
+            '''), {"usuario_id": usuario_id, "voice_hash": self.create_voice_signature(vector.tolist())})
+            conn.commit()
+
+        if self._refresh_index():
+            return True  # La recarga ya incluye el vector recién guardado
+        return self.index.add(usuario_id, vector)
+
+    def identify_voice(self, features, top_k=5, threshold=0.8):
+        """Identificar al hablante entre todos los usuarios inscritos"""
+        if features is None:
+            return []
+        self._refresh_index()
+        return self.index.search(features, top_k=top_k, threshold=threshold)
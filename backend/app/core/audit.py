@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from sqlalchemy import DateTime, bindparam, text
+from sqlalchemy.dialects import sqlite
+from app.core.config import settings
+from app.core.database import db
+
+logger = logging.getLogger(__name__)
+
+# En SQLite created_at se guarda con el mismo formato que CURRENT_TIMESTAMP
+# (el resumen horario y las particiones comparan texto)
+_CREATED_AT = DateTime().with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
+_INSERT_LOG = text('''
+    INSERT INTO security_logs (usuario_id, accion, descripcion, ip_address, created_at)
+    VALUES (:usuario_id, :accion, :descripcion, :ip_address, :created_at)
+''').bindparams(bindparam("created_at", type_=_CREATED_AT))
+
+def _insert_batch(conn, rows):
+    conn.execute(_INSERT_LOG, rows)
+
+class AuditLogWriter:
+    """
+    Escritura de security_logs en segundo plano: los eventos se encolan (cola
+    acotada) y una tarea los inserta por lotes al llegar a max_batch filas o
+    cada flush_interval segundos. Con durable=True, log() espera a que el lote
+    que contiene el evento esté confirmado en la base de datos.
+    """
+
+    def __init__(self, max_queue, max_batch, flush_interval):
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue = None
+        self._task = None
+        self._loop = None
+        self._written = 0
+        self._batches = 0
+        self._errors = 0
+        self._flush_total = 0.0
+        self._flush_max = 0.0
+        self._last_flush_at = None
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Primer uso (o nuevo event loop): la cola pertenece al loop actual
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = None
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    async def log(self, accion, descripcion=None, usuario_id=None, ip_address=None, durable=False):
+        """Encolar un evento; si la cola está llena, espera (contrapresión)"""
+        self._ensure_started()
+        created_at = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)  # UTC, como CURRENT_TIMESTAMP
+        done = self._loop.create_future() if durable else None
+        row = {
+            "usuario_id": usuario_id,
+            "accion": accion,
+            "descripcion": descripcion,
+            "ip_address": ip_address,
+            "created_at": created_at,
+        }
+        await self._queue.put((row, done))
+        if done is not None:
+            await done
+
+    async def log_committed(self, accion, descripcion=None, usuario_id=None, ip_address=None):
+        """
+        Evento durable de una operación ya confirmada: si la auditoría falla se
+        registra el error, pero no se propaga (la operación no se puede deshacer)
+        """
+        try:
+            await self.log(accion, descripcion, usuario_id, ip_address, durable=True)
+            return True
+        except Exception as e:
+            logger.error(f"Evento {accion} confirmado pero no auditado: {e}")
+            return False
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            urgent = batch[0][1] is not None
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                if urgent:
+                    # Un evento durable no espera el intervalo: se escribe con lo ya encolado
+                    try:
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    except asyncio.QueueEmpty:
+                        break
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+                urgent = batch[-1][1] is not None
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        rows = [row for row, _ in batch if row is not None]  # None: marca de flush()
+        error = None
+        if rows:
+            start = time.perf_counter()
+            try:
+                await db.run(_insert_batch, rows)
+            except Exception as e:
+                logger.error(f"Error escribiendo {len(rows)} eventos de auditoría: {e}")
+                self._errors += 1
+                error = e
+
+            elapsed = time.perf_counter() - start
+            self._batches += 1
+            self._flush_total += elapsed
+            self._flush_max = max(self._flush_max, elapsed)
+            self._last_flush_at = time.time()
+            if error is None:
+                self._written += len(rows)
+
+        for _, done in batch:
+            if done is not None and not done.done():
+                if error is None:
+                    done.set_result(None)
+                else:
+                    done.set_exception(error)
+            self._queue.task_done()
+
+    async def flush(self):
+        """Esperar a que todo lo encolado hasta ahora esté escrito (p. ej. al apagar)"""
+        if self._queue is None or self._loop is not asyncio.get_running_loop():
+            return
+        if self._task is None or self._task.done():
+            return
+        # La marca es urgente: el lote en curso se escribe sin esperar flush_interval
+        done = self._loop.create_future()
+        await self._queue.put((None, done))
+        try:
+            await done
+        except Exception:
+            pass  # El error ya quedó registrado en _flush
+
+    async def close(self):
+        """Escribir lo pendiente y detener la tarea de escritura"""
+        await self.flush()
+        if self._task is not None and self._loop is asyncio.get_running_loop():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "max_batch": self.max_batch,
+            "flush_interval_seconds": self.flush_interval,
+            "written": self._written,
+            "batches": self._batches,
+            "errors": self._errors,
+            "avg_flush_ms": round(self._flush_total / self._batches * 1000, 3) if self._batches else 0.0,
+            "max_flush_ms": round(self._flush_max * 1000, 3),
+            "last_flush_at": self._last_flush_at,
+        }
+
+audit_log = AuditLogWriter(
+    settings.AUDIT_QUEUE_MAX,
+    settings.AUDIT_BATCH_SIZE,
+    settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+)
+
+@asynccontextmanager
+async def audit_lifespan(app):
+    """Lifespan de los routers que auditan: al apagar no se pierden eventos encolados"""
+    yield
+    await audit_log.close()
@@ -0,0 +1,192 @@
+import hashlib
+import mmap
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+
+class BlobWriter:
+    """Escritura incremental de un blob; la clave es el SHA-256 del contenido"""
+
+    def __init__(self, store):
+        self.store = store
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._tmp_path = os.path.join(store.tmp_dir, uuid.uuid4().hex)
+        self._file = open(self._tmp_path, "wb")
+        self._key = None
+
+    def write(self, chunk):
+        self._hash.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self):
+        """Mover el archivo temporal a su ruta definitiva y devolver la clave"""
+        self._file.close()
+        key = self._hash.hexdigest()
+        path = self.store.path(key)
+        if os.path.exists(path):
+            # Mismo contenido ya almacenado: solo renovar su TTL
+            os.remove(self._tmp_path)
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self._tmp_path, path)
+        self._key = key
+        return key
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._key is None:
+            self._file.close()
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+
+
+class BlobStore:
+    """Almacén local de blobs direccionado por contenido, con limpieza por TTL"""
+
+    def __init__(self, root, ttl_seconds):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.tmp_dir = os.path.join(root, "tmp")
+        self.uploads_dir = os.path.join(root, "uploads")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        os.makedirs(self.uploads_dir, exist_ok=True)
+
+    def path(self, key):
+        if len(key) != 64 or any(c not in "0123456789abcdef" for c in key):
+            raise ValueError(f"Clave de blob inválida: {key!r}")
+        return os.path.join(self.root, key[:2], key)
+
+    def partial_path(self, upload_id):
+        """Archivo parcial de una subida por bloques (fuera del espacio de claves)"""
+        if not upload_id.isalnum():
+            raise ValueError(f"Id de subida inválido: {upload_id!r}")
+        return os.path.join(self.uploads_dir, upload_id)
+
+    def write_at(self, upload_id, offset, data):
+        """Escribir un bloque en su posición dentro del archivo parcial"""
+        path = self.partial_path(upload_id)
+        with open(path, "ab"):
+            pass  # Crear el archivo si es el primer bloque
+        with open(path, "r+b") as f:
+            f.seek(offset)
+            f.write(data)
+
+    def file_sha256(self, path, chunk_size=1024 * 1024):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def adopt(self, path, key=None):
+        """
+        Convertir un archivo ya escrito en blob: se renombra sin copiarlo. key es
+        el SHA-256 ya calculado del archivo (si no se pasa, se calcula aquí)
+        """
+        key = key or self.file_sha256(path)
+        target = self.path(key)
+        if os.path.exists(target):
+            os.remove(path)
+            os.utime(target)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+        return key
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def writer(self):
+        return BlobWriter(self)
+
+    def put(self, data):
+        """Guardar bytes y devolver su clave"""
+        with self.writer() as writer:
+            writer.write(data)
+            return writer.commit()
+
+    async def put_upload(self, upload, chunk_size=1024 * 1024):
+        """Guardar un UploadFile por bloques, sin cargarlo completo en memoria"""
+        # La E/S de disco corre en el threadpool para no bloquear el event loop
+        with await run_in_threadpool(self.writer) as writer:
+            while chunk := await upload.read(chunk_size):
+                await run_in_threadpool(writer.write, chunk)
+            return await run_in_threadpool(writer.commit)
+
+    async def read_payload(self, upload, inline_limit, chunk_size=1024 * 1024):
+        """
+        Payload para una tarea: bytes en línea si cabe en el límite; si no, se
+        desborda al blob store y se devuelve la referencia. También devuelve el SHA-256.
+        """
+        head = await upload.read(inline_limit + 1)
+        if len(head) <= inline_limit:
+            return head, hashlib.sha256(head).hexdigest()
+
+        with await run_in_threadpool(self.writer) as writer:
+            await run_in_threadpool(writer.write, head)
+            while chunk := await upload.read(chunk_size):
+                await run_in_threadpool(writer.write, chunk)
+            key = await run_in_threadpool(writer.commit)
+        return {"blob": key}, key
+
+    @contextmanager
+    def open_payload(self, payload):
+        """Vista de solo lectura de un payload en línea o de una referencia al blob store"""
+        if isinstance(payload, dict):
+            payload = payload["blob"]
+        if isinstance(payload, str):
+            with self.open(payload) as view:
+                yield view
+        else:
+            yield memoryview(payload)
+
+    @contextmanager
+    def open(self, key):
+        """Acceso de solo lectura al blob mediante mmap (memoryview sin copia)"""
+        with open(self.path(key), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield memoryview(b"")
+                return
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(mapped)
+            try:
+                yield view
+            finally:
+                view.release()
+                mapped.close()
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def cleanup(self, ttl_seconds=None):
+        """Eliminar blobs, temporales huérfanos y subidas abandonadas más antiguos que el TTL"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        cutoff = time.time() - ttl
+        removed = 0
+
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                file_path = os.path.join(dirpath, name)
+                try:
+                    if os.path.getmtime(file_path) < cutoff:
+                        os.remove(file_path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass  # Otro proceso ya lo eliminó
+
+        return removed
+
+
+blob_store = BlobStore(settings.BLOB_STORE_DIR, settings.BLOB_TTL_SECONDS)
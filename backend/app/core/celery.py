@@ -1,7 +1,30 @@
 from celery import Celery
+from kombu import Queue
 from app.core.config import settings
+from app.core.serialization import SERIALIZER_NAME
 import os
 
+# Colas por tipo de carga, para que los trabajos largos no retrasen los interactivos.
+# Cada cola se atiende con su propio worker (concurrencia y prefetch independientes):
+#
+#   Rostro (interactivo, p95 bajo):
+#     celery -A app.core.celery:celery_app worker -Q face -n face@%h -c 4 --prefetch-multiplier=1
+#   Audio (CPU intensivo, tareas largas):
+#     celery -A app.core.celery:celery_app worker -Q audio -n audio@%h -c 2 --prefetch-multiplier=1
+#   Masivo y mantenimiento (throughput, tolera latencia):
+#     celery -A app.core.celery:celery_app worker -Q bulk,default -n bulk@%h -c 2 --prefetch-multiplier=4
+#
+# En Redis la prioridad 0 es la más alta; dentro de una cola se atiende primero
+# lo más prioritario.
+FACE_QUEUE = "face"
+AUDIO_QUEUE = "audio"
+BULK_QUEUE = "bulk"
+DEFAULT_QUEUE = "default"
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 5
+PRIORITY_BULK = 9
+
 # Si estamos en desarrollo sin Redis, usar modo eager
 if os.getenv("USE_FAKE_REDIS", "false").lower() == "true":
     celery_app = Celery("code_brous")
@@ -17,18 +40,56 @@ else:
         backend=settings.CELERY_RESULT_BACKEND,
         include=[
             "app.tasks.audio_tasks",
-            "app.tasks.image_tasks"
+            "app.tasks.image_tasks",
+            "app.tasks.maintenance_tasks",
+            "app.core.warmup"
         ]
     )
     
     celery_app.conf.update(
-        task_serializer="json",
-        accept_content=["json"],
-        result_serializer="json",
+        task_serializer=SERIALIZER_NAME,
+        result_serializer=SERIALIZER_NAME,
+        # JSON se sigue aceptando para mensajes encolados antes del cambio
+        accept_content=[SERIALIZER_NAME, "json"],
+        result_accept_content=[SERIALIZER_NAME, "json"],
         timezone="America/Santo_Domingo",
         enable_utc=True,
         task_track_started=True,
         task_time_limit=300,
         worker_prefetch_multiplier=1,
         task_acks_late=True,
+        task_queues=(
+            Queue(FACE_QUEUE, routing_key=FACE_QUEUE),
+            Queue(AUDIO_QUEUE, routing_key=AUDIO_QUEUE),
+            Queue(BULK_QUEUE, routing_key=BULK_QUEUE),
+            Queue(DEFAULT_QUEUE, routing_key=DEFAULT_QUEUE),
+        ),
+        task_default_queue=DEFAULT_QUEUE,
+        task_default_priority=PRIORITY_NORMAL,
+        task_routes={
+            "process_face_recognition": {"queue": FACE_QUEUE, "priority": PRIORITY_INTERACTIVE},
+            "process_audio_task": {"queue": AUDIO_QUEUE, "priority": PRIORITY_NORMAL},
+            "cleanup_blob_store": {"queue": BULK_QUEUE, "priority": PRIORITY_BULK},
+            "rotate_security_logs": {"queue": BULK_QUEUE, "priority": PRIORITY_BULK},
+            "reconcile_system_counters": {"queue": BULK_QUEUE, "priority": PRIORITY_BULK},
+        },
+        broker_transport_options={
+            "priority_steps": list(range(10)),
+            "sep": ":",
+            "queue_order_strategy": "priority",
+        },
+        beat_schedule={
+            "cleanup-blob-store": {
+                "task": "cleanup_blob_store",
+                "schedule": 3600.0,  # Cada hora
+            },
+            "rotate-security-logs": {
+                "task": "rotate_security_logs",
+                "schedule": 3600.0,  # Cada hora; los días cerrados se mueven en la primera pasada
+            },
+            "reconcile-system-counters": {
+                "task": "reconcile_system_counters",
+                "schedule": 900.0,  # Cada 15 minutos
+            },
+        },
     )
\ No newline at end of file
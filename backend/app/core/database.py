@@ -0,0 +1,303 @@
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app.core.config import settings
+from database.migrations import migrate
+
+# Ajustes de SQLite aplicados a cada conexión nueva
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",          # Lectores no bloquean al escritor
+    "PRAGMA synchronous=NORMAL",        # Seguro con WAL, un fsync por checkpoint
+    f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+    f"PRAGMA cache_size=-{settings.SQLITE_CACHE_KB}",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Driver de cada motor soportado: async para las rutas, síncrono para workers y CLI
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+SYNC_DRIVERS = {"sqlite": "sqlite", "postgresql": "postgresql+psycopg2"}
+
+_migrated = set()
+
+def ensure_migrated(db_path):
+    # Una vez por proceso y ruta; con el esquema al día es una lectura de user_version
+    if db_path not in _migrated:
+        migrate(db_path)
+        _migrated.add(db_path)
+
+def _with_driver(url, drivers):
+    url = make_url(url or settings.DATABASE_URL)
+    backend = url.get_backend_name()
+    if backend not in drivers:
+        raise ValueError(f"DATABASE_URL usa un motor no soportado ({backend}): se admiten sqlite y postgresql")
+    return url.set(drivername=drivers[backend])
+
+def async_url(url=None):
+    return _with_driver(url, ASYNC_DRIVERS)
+
+def sync_url(url=None):
+    return _with_driver(url, SYNC_DRIVERS)
+
+def is_sqlite(url=None):
+    return make_url(url or settings.DATABASE_URL).get_backend_name() == "sqlite"
+
+def sqlite_path(url=None):
+    """
+    Ruta del archivo SQLite de DATABASE_URL, para el código propio de SQLite
+    (migraciones, particiones, CLI de inscripción masiva)
+    """
+    url = make_url(url or settings.DATABASE_URL)
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        raise ValueError(f"Se necesita un archivo SQLite (sqlite:///ruta.db), no {url.render_as_string()}")
+    return url.database
+
+def apply_pragmas(dbapi_conn):
+    cursor = dbapi_conn.cursor()
+    for pragma in PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+def _engine_options(url, asynchronous):
+    """Caché de sentencias y ajustes propios de cada motor"""
+    options = {"query_cache_size": settings.DB_STATEMENT_CACHE_SIZE}  # SQL compilado por SQLAlchemy
+    if url.get_backend_name() == "sqlite":
+        # El esquema de SQLite lo crean las migraciones versionadas
+        ensure_migrated(sqlite_path(url))
+        connect_args = {"cached_statements": settings.DB_STATEMENT_CACHE_SIZE}  # Sentencias preparadas por conexión
+        if not asynchronous:
+            connect_args["check_same_thread"] = False  # Las conexiones del pool pasan de un hilo a otro
+        options["connect_args"] = connect_args
+    else:
+        options["pool_pre_ping"] = True  # Conexiones cortadas por el servidor
+        if asynchronous:
+            options["connect_args"] = {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    return options
+
+def _sqlite_events(engine):
+    event.listen(engine, "connect", lambda dbapi_conn, record: apply_pragmas(dbapi_conn))
+    # pysqlite/aiosqlite no envían BEGIN al iniciar la transacción de SQLAlchemy: sin
+    # esto un SAVEPOINT sería la transacción exterior y su RELEASE confirmaría los datos
+    event.listen(engine, "begin", lambda conn: conn.exec_driver_sql("BEGIN"))
+
+def sync_engine(url=None, **options):
+    """Motor síncrono de SQLAlchemy sobre DATABASE_URL (workers, servicios y CLI)"""
+    url = make_url(url or settings.DATABASE_URL)
+    engine = create_engine(sync_url(url), **_engine_options(url, asynchronous=False), **options)
+    if is_sqlite(url):
+        _sqlite_events(engine)
+    return engine
+
+def async_engine(url=None, **options):
+    """Motor async de SQLAlchemy sobre DATABASE_URL (rutas)"""
+    url = make_url(url or settings.DATABASE_URL)
+    engine = create_async_engine(async_url(url), **_engine_options(url, asynchronous=True), **options)
+    if is_sqlite(url):
+        _sqlite_events(engine.sync_engine)
+    return engine
+
+def connect(db_path=None):
+    """Abrir una conexión SQLite suelta con los pragmas de rendimiento (CLI de SQLite)"""
+    db_path = db_path or sqlite_path()
+    ensure_migrated(db_path)
+
+    conn = sqlite3.connect(
+        db_path,
+        check_same_thread=False,
+        cached_statements=settings.DB_STATEMENT_CACHE_SIZE,
+    )
+    apply_pragmas(conn)
+    return conn
+
+class PoolMetrics:
+    """Conexiones abiertas, invalidadas y espera en cola hasta obtener una del pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.invalidations = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def listen(self, engine):
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_conn, record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_invalidate(self, dbapi_conn, record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def start(self):
+        with self._lock:
+            self.waiting += 1
+        return time.perf_counter()
+
+    def done(self, start):
+        wait = time.perf_counter() - start
+        with self._lock:
+            self.waiting -= 1
+            self.acquired += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def stats(self, pool):
+        with self._lock:
+            return {
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "queued": self.waiting,  # Consultas esperando una conexión ahora mismo
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "acquired": self.acquired,
+                "avg_wait_ms": round(self.wait_total / self.acquired * 1000, 3) if self.acquired else 0.0,
+                "max_wait_ms": round(self.wait_max * 1000, 3),
+            }
+
+class Database:
+    """
+    Acceso a la base de datos de DATABASE_URL para todo el proceso.
+
+    Las rutas usan el motor async (AsyncEngine y AsyncSession, aiosqlite o
+    asyncpg): run/fetchone/fetchall/execute y session(). Los workers de Celery,
+    los servicios síncronos y la CLI usan connection(), del motor síncrono
+    sobre la misma URL. Ambos pools (QueuePool, LIFO) miden cuánto espera cada
+    consulta hasta obtener una conexión.
+    """
+
+    def __init__(self, url, pool_size, max_overflow, pool_timeout):
+        self.url = make_url(url)
+        async_url(self.url)  # Falla al arrancar si el motor no está soportado
+        self.dialect = self.url.get_backend_name()
+        self.is_sqlite = self.dialect == "sqlite"
+        self.path = sqlite_path(self.url) if self.is_sqlite else None
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self._engine = None
+        self._sync_engine = None
+        self._lock = threading.Lock()
+        self._metrics = PoolMetrics()
+        self._sync_metrics = PoolMetrics()
+
+    def _pool_options(self):
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_use_lifo": True,  # Las conexiones calientes se reutilizan primero
+            # Connection.close() ya revierte lo abierto: el rollback extra del
+            # pool en cada devolución sobra
+            "pool_reset_on_return": None,
+        }
+
+    @property
+    def engine(self):
+        # Se crea al primer uso para no tocar la base de datos al importar el módulo
+        with self._lock:
+            if self._engine is None:
+                self._engine = async_engine(self.url, **self._pool_options())
+                self._metrics.listen(self._engine.sync_engine)
+            return self._engine
+
+    @property
+    def sync_engine(self):
+        with self._lock:
+            if self._sync_engine is None:
+                self._sync_engine = sync_engine(self.url, **self._pool_options())
+                self._sync_metrics.listen(self._sync_engine)
+            return self._sync_engine
+
+    @asynccontextmanager
+    async def _connect(self):
+        engine = self.engine
+        start = self._metrics.start()
+        try:
+            conn = await engine.connect()  # Espera en la cola del pool si está lleno
+        finally:
+            self._metrics.done(start)
+        try:
+            yield conn
+        finally:
+            await conn.close()
+
+    @asynccontextmanager
+    async def session(self):
+        """AsyncSession sobre una conexión del pool; el llamador confirma con commit()"""
+        async with self._connect() as conn:
+            async with AsyncSession(bind=conn, expire_on_commit=False) as session:
+                yield session
+
+    @contextmanager
+    def connection(self):
+        """Connection síncrona del pool (workers, servicios); el llamador confirma con commit()"""
+        engine = self.sync_engine
+        start = self._sync_metrics.start()
+        try:
+            conn = engine.connect()
+        finally:
+            self._sync_metrics.done(start)
+        with conn:
+            yield conn
+
+    async def run(self, fn, *args):
+        """Ejecutar fn(conn, *args) con una Connection síncrona en una transacción (commit al terminar)"""
+        async with self._connect() as conn:
+            async with conn.begin():
+                return await conn.run_sync(fn, *args)
+
+    async def fetchone(self, sql, params=None):
+        async with self._connect() as conn:
+            return (await conn.execute(text(sql), params or {})).fetchone()
+
+    async def fetchall(self, sql, params=None):
+        async with self._connect() as conn:
+            return (await conn.execute(text(sql), params or {})).fetchall()
+
+    async def execute(self, sql, params=None):
+        """Ejecutar una escritura y confirmarla; devuelve las filas afectadas"""
+        async with self._connect() as conn:
+            async with conn.begin():
+                return (await conn.execute(text(sql), params or {})).rowcount
+
+    def stats(self):
+        """Ocupación de los pools y espera en cola para obtener una conexión"""
+        return {
+            "dialect": self.dialect,
+            "path": self.path,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            **self._metrics.stats(self.engine.pool),
+            "sincrono": self._sync_metrics.stats(self.sync_engine.pool),
+        }
+
+    async def close(self):
+        with self._lock:
+            engine, self._engine = self._engine, None
+            sync, self._sync_engine = self._sync_engine, None
+        if engine is not None:
+            await engine.dispose()
+        if sync is not None:
+            sync.dispose()
+
+async def get_session():
+    """Dependencia de FastAPI: una AsyncSession por petición"""
+    async with db.session() as session:
+        yield session
+
+db = Database(
+    settings.DATABASE_URL,
+    settings.DB_POOL_SIZE,
+    settings.DB_MAX_OVERFLOW,
+    settings.DB_POOL_TIMEOUT,
+)
@@ -0,0 +1,66 @@
+from celery import uuid
+from app.core.celery import celery_app
+from app.core.config import settings
+from app.core.redis import redis_client
+
+DEDUP_KEY_PREFIX = "task_dedup:"
+RETRYABLE_STATES = {"FAILURE", "REVOKED"}
+
+def _failed(task_id):
+    """
+    La tarea falló: estado de fallo, o SUCCESS con status "error" (las tareas de
+    audio y rostro capturan sus excepciones y devuelven el error como resultado)
+    """
+    task_result = celery_app.AsyncResult(task_id)
+    state = task_result.state
+    if state in RETRYABLE_STATES:
+        return True
+    if state == "SUCCESS":
+        result = task_result.result
+        return isinstance(result, dict) and result.get("status") == "error"
+    return False
+
+def dedup_key_for(payload_hash, idempotency_key=None):
+    """Clave explícita del cliente si existe; si no, el hash del contenido"""
+    if idempotency_key:
+        return f"idem:{idempotency_key}"
+    return f"sha256:{payload_hash}"
+
+def submit_once(task, args, dedup_key, window_seconds=None):
+    """
+    Encolar la tarea solo si no hay una idéntica en cola, en curso o terminada
+    dentro de la ventana. Devuelve (task_id, deduplicada).
+    """
+    window = window_seconds or settings.TASK_DEDUP_WINDOW_SECONDS
+    key = f"{DEDUP_KEY_PREFIX}{task.name}:{dedup_key}"
+
+    for _ in range(3):
+        task_id = uuid()
+        # SET NX reserva la clave antes de encolar: dos envíos simultáneos no duplican
+        if redis_client.set(key, task_id, nx=True, ex=window):
+            try:
+                task.apply_async(args=args, task_id=task_id)
+            except Exception:
+                redis_client.delete(key)
+                raise
+            return task_id, False
+
+        existing = redis_client.get(key)
+        if existing is None:
+            continue  # Expiró entre SET y GET
+
+        if _failed(existing):
+            # Un fallo no se reutiliza: liberar la clave y volver a intentar
+            redis_client.delete(key)
+            continue
+
+        return existing, True
+
+    raise RuntimeError("No se pudo reservar la clave de deduplicación")
+
+def existing_result(task_id):
+    """Resultado ya disponible de una tarea deduplicada (None si no terminó)"""
+    task_result = celery_app.AsyncResult(task_id)
+    if task_result.successful():
+        return task_result.result
+    return None
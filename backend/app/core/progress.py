@@ -0,0 +1,105 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from celery.signals import task_postrun
+from app.core.redis import redis_client
+from app.core.serialization import json_default
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_CHANNEL = "task_progress"
+TERMINAL_STATES = {"SUCCESS", "FAILURE", "REVOKED"}
+
+def publish_progress(task_id, state, meta=None):
+    """Publicar un cambio de estado de tarea en Redis pub/sub"""
+    message = {"task_id": task_id, "state": state, "meta": meta, "updated_at": time.time()}
+    try:
+        redis_client.publish(PROGRESS_CHANNEL, json.dumps(message, default=json_default))
+    except Exception as e:
+        # El progreso en vivo es opcional: nunca debe romper la tarea
+        logger.warning(f"No se pudo publicar progreso de {task_id}: {e}")
+
+def report_progress(task, meta, state="PROGRESS"):
+    """Guardar el progreso en el backend de resultados y publicarlo a los clientes"""
+    meta = dict(meta, updated_at=time.time())
+    task.update_state(state=state, meta=meta)
+    publish_progress(task.request.id, state, meta)
+
+@task_postrun.connect
+def publish_final_state(task_id=None, state=None, retval=None, **kwargs):
+    if isinstance(retval, BaseException):
+        retval = {"error": str(retval)}
+    publish_progress(task_id, state, retval)
+
+
+class ProgressBroker:
+    """Una sola suscripción Redis por proceso web, repartida a todos los clientes"""
+
+    def __init__(self, client, channel=PROGRESS_CHANNEL, queue_size=100):
+        self.client = client
+        self.channel = channel
+        self.queue_size = queue_size
+        self._subscribers = {}  # task_id -> {(loop, queue)}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen, name="progress-listener", daemon=True)
+                self._thread.start()
+
+    def _listen(self):
+        backoff = 1
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                backoff = 1
+                for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._dispatch(message["data"])
+            except Exception as e:
+                logger.warning(f"Suscripción de progreso interrumpida: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def _dispatch(self, raw):
+        try:
+            event = json.loads(raw)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            targets = list(self._subscribers.get(event.get("task_id"), ()))
+        for loop, queue in targets:
+            loop.call_soon_threadsafe(self._offer, queue, event)
+
+    @staticmethod
+    def _offer(queue, event):
+        # Cliente lento: se descarta el evento más antiguo, el último estado siempre llega
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    @asynccontextmanager
+    async def subscribe(self, task_id):
+        """Cola asyncio con los eventos de una tarea mientras dure el contexto"""
+        self._ensure_listener()
+        entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.queue_size))
+        with self._lock:
+            self._subscribers.setdefault(task_id, set()).add(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(task_id)
+                if subscribers is not None:
+                    subscribers.discard(entry)
+                    if not subscribers:
+                        del self._subscribers[task_id]
+
+
+progress_broker = ProgressBroker(redis_client)
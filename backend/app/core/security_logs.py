@@ -0,0 +1,72 @@
+import re
+from datetime import datetime, timedelta, timezone
+
+# security_logs guarda solo el día en curso; los días cerrados se mueven a una
+# tabla por día (security_logs_AAAAMMDD) y la retención borra tablas completas.
+# Los conteos por hora y acción viven en security_logs_hourly (mantenida por trigger).
+PARTITION_PATTERN = re.compile(r"^security_logs_(\d{8})$")
+
+def partition_name(day):
+    return f"security_logs_{day:%Y%m%d}"
+
+def partitions(conn):
+    """Particiones diarias existentes como {fecha: tabla}, ordenadas por fecha"""
+    tablas = {}
+    for (nombre,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'security_logs_%'"):
+        match = PARTITION_PATTERN.match(nombre)
+        if match:
+            tablas[datetime.strptime(match.group(1), "%Y%m%d").date()] = nombre
+    return dict(sorted(tablas.items()))
+
+def _move_day(conn, day):
+    tabla = partition_name(day)
+    desde, hasta = day.isoformat(), (day + timedelta(days=1)).isoformat()
+    with conn:
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {tabla} (
+                id INTEGER PRIMARY KEY,
+                usuario_id INTEGER,
+                accion TEXT NOT NULL,
+                descripcion TEXT,
+                ip_address TEXT,
+                created_at DATETIME
+            )
+        ''')
+        moved = conn.execute(f'''
+            INSERT INTO {tabla} (id, usuario_id, accion, descripcion, ip_address, created_at)
+            SELECT id, usuario_id, accion, descripcion, ip_address, created_at
+            FROM security_logs WHERE created_at >= ? AND created_at < ?
+        ''', (desde, hasta)).rowcount
+        conn.execute("DELETE FROM security_logs WHERE created_at >= ? AND created_at < ?", (desde, hasta))
+    return moved
+
+def rotate_partitions(conn, retention_days, rollup_retention_days, today=None):
+    """
+    Mover los días cerrados a su partición, borrar particiones fuera de la
+    retención y recortar el resumen horario. Es idempotente.
+    """
+    today = today or datetime.now(timezone.utc).date()  # created_at está en UTC
+
+    dias = [
+        datetime.strptime(row[0], "%Y-%m-%d").date()
+        for row in conn.execute(
+            "SELECT DISTINCT date(created_at) FROM security_logs WHERE created_at < ?", (today.isoformat(),)
+        )
+        if row[0]
+    ]
+    moved = {day.isoformat(): _move_day(conn, day) for day in dias}
+
+    limite = today - timedelta(days=retention_days)
+    dropped = []
+    for day, tabla in partitions(conn).items():
+        if day < limite:
+            conn.execute(f"DROP TABLE {tabla}")
+            dropped.append(tabla)
+
+    with conn:
+        rollup_deleted = conn.execute(
+            "DELETE FROM security_logs_hourly WHERE hora < ?",
+            ((today - timedelta(days=rollup_retention_days)).isoformat(),)
+        ).rowcount
+
+    return {"moved": moved, "dropped": dropped, "rollup_deleted": rollup_deleted}
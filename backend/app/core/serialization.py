@@ -0,0 +1,88 @@
+import datetime
+import zlib
+import msgpack
+import numpy as np
+from kombu.serialization import register
+
+# Serializador msgpack con soporte para arreglos NumPy y compresión opcional
+SERIALIZER_NAME = "msgpack_np"
+CONTENT_TYPE = "application/x-msgpack-np"
+COMPRESSION_THRESHOLD = 16 * 1024  # Bytes: por debajo no compensa comprimir
+
+EXT_NDARRAY = 1
+EXT_DATETIME = 2
+EXT_DATE = 3
+
+# Primer byte del mensaje: indica si el cuerpo va comprimido
+FLAG_RAW = b"\x00"
+FLAG_ZLIB = b"\x01"
+
+def _default(obj):
+    if isinstance(obj, np.ndarray) and obj.dtype != object:
+        # Buffer crudo little-endian + dtype y forma
+        array = np.ascontiguousarray(obj)
+        if array.dtype.byteorder == ">":
+            array = array.astype(array.dtype.newbyteorder("<"))
+        # Forma del original: ascontiguousarray convierte los 0-d en (1,)
+        header = [array.dtype.str, list(obj.shape)]
+        return msgpack.ExtType(EXT_NDARRAY, msgpack.packb(header) + array.tobytes())
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, datetime.datetime):
+        return msgpack.ExtType(EXT_DATETIME, obj.isoformat().encode())
+    if isinstance(obj, datetime.date):
+        return msgpack.ExtType(EXT_DATE, obj.isoformat().encode())
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+def _ext_hook(code, data):
+    if code == EXT_NDARRAY:
+        unpacker = msgpack.Unpacker()
+        unpacker.feed(data)
+        dtype, shape = unpacker.unpack()
+        offset = unpacker.tell()
+        return np.frombuffer(data, dtype=np.dtype(dtype), offset=offset).reshape(tuple(shape))  # () para arreglos 0-d
+    if code == EXT_DATETIME:
+        return datetime.datetime.fromisoformat(data.decode())
+    if code == EXT_DATE:
+        return datetime.date.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+def dumps(obj):
+    packed = msgpack.packb(obj, default=_default, use_bin_type=True)
+    if len(packed) >= COMPRESSION_THRESHOLD:
+        compressed = zlib.compress(packed, 1)
+        if len(compressed) < len(packed):
+            return FLAG_ZLIB + compressed
+    return FLAG_RAW + packed
+
+def loads(data):
+    if isinstance(data, str):
+        data = data.encode("latin-1")
+    body = memoryview(data)[1:]
+    if data[:1] == FLAG_ZLIB:
+        body = zlib.decompress(body)
+    return msgpack.unpackb(body, ext_hook=_ext_hook, raw=False, strict_map_key=False)
+
+def to_jsonable(obj):
+    """Convertir arreglos/escalares NumPy a tipos JSON para las respuestas HTTP"""
+    if isinstance(obj, dict):
+        return {key: to_jsonable(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(value) for value in obj]
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+def json_default(obj):
+    """Para json.dumps(default=...): NumPy a listas, el resto como texto"""
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return to_jsonable(obj)
+    return str(obj)
+
+register(SERIALIZER_NAME, dumps, loads, content_type=CONTENT_TYPE, content_encoding="binary")
@@ -0,0 +1,73 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from app.core.database import db
+
+logger = logging.getLogger(__name__)
+
+# Contador -> consulta que lo calcula desde las tablas reales. Los triggers de la
+# migración 7 mantienen system_counters al día; reconcile_counters corrige la
+# deriva (escrituras fuera de la aplicación, REPLACE, ediciones manuales).
+COUNTER_QUERIES = {
+    "usuarios": "SELECT COUNT(*) FROM usuarios",
+    "usuarios_voz": "SELECT COUNT(DISTINCT usuario_id) FROM voice_profiles",
+    "usuarios_rostro": "SELECT COUNT(*) FROM face_profiles",
+    # Eventos dentro de la retención del resumen horario (ver app.core.security_logs)
+    "eventos_seguridad": "SELECT COALESCE(SUM(total), 0) FROM security_logs_hourly",
+}
+
+async def read_counters():
+    """Todos los contadores en una sola lectura de una tabla de pocas filas"""
+    if not db.is_sqlite:
+        # system_counters y sus triggers son de las migraciones de SQLite: otros
+        # motores cuentan sobre las tablas
+        contadores = {}
+        for nombre, sql in COUNTER_QUERIES.items():
+            if nombre == "eventos_seguridad":
+                sql = "SELECT COUNT(*) FROM security_logs"
+            contadores[nombre] = (await db.fetchone(sql))[0]
+        return contadores
+    rows = await db.fetchall("SELECT nombre, valor FROM system_counters")
+    return dict(rows)
+
+async def recent_activity(hours=24):
+    """Eventos por acción en las últimas horas, desde el resumen horario en SQLite"""
+    desde = datetime.now(timezone.utc) - timedelta(hours=hours)
+    if not db.is_sqlite:
+        rows = await db.fetchall(
+            "SELECT accion, COUNT(*) FROM security_logs WHERE created_at >= :desde GROUP BY accion",
+            {"desde": desde.replace(tzinfo=None)}
+        )
+    else:
+        rows = await db.fetchall('''
+            SELECT accion, SUM(total) as count 
+            FROM security_logs_hourly 
+            WHERE hora >= :desde
+            GROUP BY accion
+        ''', {"desde": desde.strftime("%Y-%m-%d %H:00:00")})
+    return {row[0]: row[1] for row in rows}
+
+def reconcile_counters(conn):
+    """
+    Recalcular los contadores (SQLite, conexión sqlite3) bajo bloqueo de escritura (ningún trigger corre
+    mientras se cuenta) y corregir los que difieran; devuelve la deriva encontrada
+    """
+    drift = {}
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        actuales = dict(conn.execute("SELECT nombre, valor FROM system_counters"))
+        for nombre, sql in COUNTER_QUERIES.items():
+            real = conn.execute(sql).fetchone()[0]
+            if actuales.get(nombre) != real:
+                drift[nombre] = real - (actuales.get(nombre) or 0)
+                conn.execute(
+                    "INSERT OR REPLACE INTO system_counters (nombre, valor) VALUES (?, ?)",
+                    (nombre, real)
+                )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    if drift:
+        logger.warning(f"Contadores del sistema corregidos: {drift}")
+    return drift
@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from functools import lru_cache
+from celery.signals import worker_process_init, worker_process_shutdown, task_prerun, task_postrun
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+READY_KEY_PREFIX = "worker_warm:"
+READY_TTL_SECONDS = 60
+
+# Componentes a precargar en cada proceso hijo (WORKER_WARMUP=face,audio)
+WARMUP_COMPONENTS = [
+    c.strip() for c in os.getenv("WORKER_WARMUP", "face,audio").split(",") if c.strip()
+]
+
+_warmup_stats = {}
+_task_started = {}
+
+@lru_cache(maxsize=1)
+def get_face_cascade():
+    """Clasificador Haar de rostros frontales, cargado una vez por proceso"""
+    import cv2
+    return cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+
+def warm_face_models():
+    """Cargar modelos dlib (detector, landmarks, encoder), la cascada Haar y el índice de rostros"""
+    import numpy as np
+    import face_recognition
+    from app.tasks.image_tasks import get_face_index
+
+    blank = np.zeros((64, 64, 3), dtype=np.uint8)
+    face_recognition.face_encodings(blank, known_face_locations=[(0, 64, 64, 0)])
+    get_face_cascade()
+    get_face_index()
+
+def warm_audio_models():
+    """Importar librosa, compilar kernels y llenar los cachés de filtros"""
+    import numpy as np
+    from app.api.routes.voice_ml import TARGET_SAMPLE_RATE
+    from app.tasks.audio_tasks import get_voice_service
+
+    t = np.arange(TARGET_SAMPLE_RATE, dtype=np.float32) / TARGET_SAMPLE_RATE
+    get_voice_service().pipeline.extract(0.3 * np.sin(2 * np.pi * 220 * t), TARGET_SAMPLE_RATE)
+
+WARMERS = {
+    "face": warm_face_models,
+    "audio": warm_audio_models,
+}
+
+def warm_up(components=None):
+    """Precargar los componentes indicados y devolver el tiempo de cada uno"""
+    stats = {}
+    for name in components or WARMUP_COMPONENTS:
+        warmer = WARMERS.get(name)
+        if warmer is None:
+            logger.warning(f"Componente de precarga desconocido: {name}")
+            continue
+        start = time.perf_counter()
+        try:
+            warmer()
+            stats[name] = round(time.perf_counter() - start, 3)
+        except Exception as e:
+            logger.error(f"Error precargando {name}: {e}")
+    return stats
+
+def _ready_key():
+    return f"{READY_KEY_PREFIX}{socket.gethostname()}:{os.getpid()}"
+
+def _publish_ready():
+    redis_client.setex(_ready_key(), READY_TTL_SECONDS, json.dumps(_warmup_stats))
+
+def _keep_ready_alive():
+    while True:
+        time.sleep(READY_TTL_SECONDS / 2)
+        try:
+            _publish_ready()
+        except Exception as e:
+            logger.warning(f"No se pudo renovar la señal de disponibilidad: {e}")
+
+@worker_process_init.connect
+def warm_worker_process(**kwargs):
+    """Precarga en cada proceso hijo antes de que reciba su primera tarea"""
+    _warmup_stats.update(warm_up())
+    logger.info(f"Proceso {os.getpid()} precargado: {_warmup_stats}")
+    try:
+        _publish_ready()
+        threading.Thread(target=_keep_ready_alive, name="warmup-ready", daemon=True).start()
+    except Exception as e:
+        logger.warning(f"No se pudo publicar la señal de disponibilidad: {e}")
+
+@worker_process_shutdown.connect
+def clear_ready_signal(**kwargs):
+    try:
+        redis_client.delete(_ready_key())
+    except Exception:
+        pass
+
+@task_prerun.connect
+def record_task_start(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+@task_postrun.connect
+def record_task_latency(task_id=None, task=None, **kwargs):
+    """Latencia de la primera tarea del proceso y media móvil de las siguientes"""
+    started = _task_started.pop(task_id, None)
+    if started is None:
+        return
+    elapsed = round(time.perf_counter() - started, 3)
+    if "first_task_seconds" not in _warmup_stats:
+        _warmup_stats["first_task_seconds"] = elapsed
+        logger.info(f"Primera tarea en proceso {os.getpid()} ({task.name}): {elapsed}s")
+    else:
+        previous = _warmup_stats.get("steady_task_seconds", elapsed)
+        _warmup_stats["steady_task_seconds"] = round(0.9 * previous + 0.1 * elapsed, 3)
+
+def warm_workers():
+    """Procesos de worker precargados y vivos (para la verificación de disponibilidad)"""
+    workers = {}
+    for key in redis_client.scan_iter(f"{READY_KEY_PREFIX}*"):
+        value = redis_client.get(key)
+        if value is not None:
+            workers[key[len(READY_KEY_PREFIX):]] = json.loads(value)
+    return workers
@@ -1,40 +1,96 @@
 from app.core.celery import celery_app
-import time
+from app.core.blob_store import blob_store
+from app.core.progress import report_progress
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+MAX_WINDOW_SECONDS = 15.0
+TRANSCRIPTION_THREADS = 4
+
+_voice_service = None
+
+def get_voice_service():
+    """VoiceMLService del proceso (librosa solo se importa en el worker)"""
+    global _voice_service
+    if _voice_service is None:
+        from app.api.routes.voice_ml import VoiceMLService
+        _voice_service = VoiceMLService()
+    return _voice_service
+
+def process_window(service, y, sample_rate, index, start, end):
+    """Transcribir y extraer características de una ventana de audio"""
+    segment = y[start:end]
+    partial = {
+        "index": index,
+        "start_seconds": round(start / sample_rate, 2),
+        "end_seconds": round(end / sample_rate, 2),
+    }
+    try:
+        partial["text"] = service.transcribe(segment, sample_rate)
+    except Exception as e:
+        logger.warning(f"Error transcribiendo ventana {index}: {e}")
+        partial["text"] = ""
+        partial["error"] = str(e)
+    partial["features"] = service.pipeline.extract(segment, sample_rate).tolist()
+    return partial
+
 @celery_app.task(bind=True, name="process_audio_task")
-def process_audio_task(self, audio_data: bytes, filename: str):
+def process_audio_task(self, blob_key: str, filename: str):
     """
-    Procesa audio de forma asíncrona
+    Procesa audio de forma asíncrona (el audio se lee del blob store).
+    El audio se divide en ventanas por silencios y cada resultado parcial se
+    publica apenas termina; la transcripción final se arma en orden.
     """
     try:
-        # Simulamos procesamiento pesado
-        total_steps = 5
-        for i in range(total_steps):
-            time.sleep(1)  # Simula 1 segundo de procesamiento por paso
-            self.update_state(
-                state='PROGRESS',
-                meta={
-                    'current': i + 1,
-                    'total': total_steps,
-                    'status': f'Procesando paso {i+1} de {total_steps}'
-                }
-            )
-        
-        # Resultado simulado del procesamiento de audio
+        from app.api.routes.voice_ml import load_audio
+
+        service = get_voice_service()
+        with blob_store.open(blob_key) as audio_data:
+            size_bytes = len(audio_data)
+            y, sample_rate = load_audio(audio_data, duration=None)
+            # decode_wav puede devolver una vista del mmap (float32 a 22050 Hz):
+            # copiar antes de cerrar el blob
+            y = np.array(y)
+
+        windows = service.vad.segments(y, sample_rate, max_window_seconds=MAX_WINDOW_SECONDS)
+        total = len(windows)
+        report_progress(self, {
+            'current': 0,
+            'total': total,
+            'status': f'Audio dividido en {total} ventanas'
+        })
+
+        segments = [None] * total
+        with ThreadPoolExecutor(max_workers=TRANSCRIPTION_THREADS) as executor:
+            futures = [
+                executor.submit(process_window, service, y, sample_rate, index, start, end)
+                for index, (start, end) in enumerate(windows)
+            ]
+            for completed, future in enumerate(as_completed(futures), start=1):
+                partial = future.result()
+                segments[partial["index"]] = partial
+                report_progress(self, {
+                    'current': completed,
+                    'total': total,
+                    'status': f'Ventana {partial["index"] + 1} de {total} procesada',
+                    'partial': partial
+                })
+
         return {
             "status": "success",
             "message": f"Audio {filename} procesado correctamente",
-            "transcription": "Este es un texto de ejemplo transcrito del audio.",
-            "duration_seconds": 5.5,
-            "confidence": 0.89
+            "transcription": " ".join(s["text"] for s in segments if s["text"]),
+            "segments": [{k: v for k, v in s.items() if k != "features"} for s in segments],
+            "duration_seconds": round(len(y) / sample_rate, 2),
+            "size_bytes": size_bytes
         }
-        
+
     except Exception as e:
         logger.error(f"Error procesando audio: {str(e)}")
         return {
             "status": "error",
             "message": f"Error procesando audio: {str(e)}"
-        }
\ No newline at end of file
+        }
@@ -1,49 +1,148 @@
 from app.core.celery import celery_app
+from app.core.blob_store import blob_store
+from app.core.warmup import get_face_cascade
+from app.core.database import db
+from sqlalchemy import text
+import cv2
 import logging
-import os
-import uuid
+import threading
+import time
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Parámetros del control de calidad
+MAX_IMAGE_SIDE = 1280          # Imágenes mayores se reducen antes de detectar
+MIN_FACE_SIDE = 80             # Rostros más pequeños no dan encodings fiables
+MIN_SHARPNESS = 30.0           # Varianza del Laplaciano
+MIN_BRIGHTNESS = 40.0
+MAX_BRIGHTNESS = 220.0
+
+FACE_MATCH_TOLERANCE = 0.6     # Distancia euclidiana de face_recognition
+FACE_INDEX_TTL_SECONDS = 300
+
+_face_index = {"ids": [], "matrix": np.empty((0, 128)), "loaded_at": 0.0}
+_face_index_lock = threading.Lock()
+
+def get_face_index():
+    """Rostros registrados como matriz (n, 128), recargada cada pocos minutos"""
+    with _face_index_lock:
+        if time.monotonic() - _face_index["loaded_at"] > FACE_INDEX_TTL_SECONDS:
+            with db.connection() as conn:
+                rows = conn.execute(text("SELECT usuario_id, face_encoding FROM face_profiles")).fetchall()
+
+            _face_index["ids"] = [row[0] for row in rows]
+            _face_index["matrix"] = (
+                np.array([np.fromstring(row[1], sep=',') for row in rows])
+                if rows else np.empty((0, 128))
+            )
+            _face_index["loaded_at"] = time.monotonic()
+        return _face_index["ids"], _face_index["matrix"]
+
+def decode_image(buffer):
+    """Decodificar la imagen directamente desde el buffer (sin archivo temporal)"""
+    image = cv2.imdecode(np.frombuffer(buffer, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return None
+
+    height, width = image.shape[:2]
+    scale = MAX_IMAGE_SIDE / max(height, width)
+    if scale < 1:
+        image = cv2.resize(image, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    return image
+
+def quality_gate(gray):
+    """Métricas de calidad y motivo de rechazo (None si la imagen es aceptable)"""
+    metrics = {
+        "sharpness": float(cv2.Laplacian(gray, cv2.CV_64F).var()),
+        "brightness": float(gray.mean()),
+    }
+    if metrics["sharpness"] < MIN_SHARPNESS:
+        return metrics, "Imagen demasiado borrosa"
+    if not MIN_BRIGHTNESS <= metrics["brightness"] <= MAX_BRIGHTNESS:
+        return metrics, "Iluminación inadecuada"
+    return metrics, None
+
+def detect_largest_face(gray):
+    """Rostro más grande detectado con la cascada Haar, en formato (top, right, bottom, left)"""
+    faces = get_face_cascade().detectMultiScale(gray, 1.1, 4, minSize=(MIN_FACE_SIDE, MIN_FACE_SIDE))
+    if len(faces) == 0:
+        return None, 0
+    x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+    return (int(y), int(x + w), int(y + h), int(x)), len(faces)
+
+def match_face(encoding):
+    """Usuario registrado más cercano dentro de la tolerancia"""
+    import face_recognition
+
+    ids, matrix = get_face_index()
+    if not ids:
+        return None, None
+    distances = face_recognition.face_distance(matrix, encoding)
+    best = int(np.argmin(distances))
+    distance = float(distances[best])
+    if distance <= FACE_MATCH_TOLERANCE:
+        return ids[best], distance
+    return None, distance
+
 @celery_app.task(bind=True, name="process_face_recognition")
-def process_face_recognition(self, image_data: bytes, filename: str):
+def process_face_recognition(self, payload, filename: str):
     """
-    Procesa reconocimiento facial de forma asíncrona
+    Procesa reconocimiento facial en memoria: decodificar, control de calidad,
+    detectar, codificar y comparar con el índice de rostros
     """
+    import face_recognition
+
     try:
-        # Guardar archivo temporal
-        temp_dir = "temp_images"
-        os.makedirs(temp_dir, exist_ok=True)
-        
-        file_path = os.path.join(temp_dir, f"{uuid.uuid4()}_{filename}")
-        
-        with open(file_path, "wb") as f:
-            f.write(image_data)
-        
-        # Aquí va tu lógica de face_auth.py
-        # Por ejemplo:
-        # result = authenticate_face(file_path)
-        
-        # Simulamos procesamiento
-        import time
-        time.sleep(3)  # Simula procesamiento
-        
-        # Limpiar archivo temporal
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        
+        with blob_store.open_payload(payload) as image_data:
+            image = decode_image(image_data)
+
+        if image is None:
+            return {
+                "status": "rejected",
+                "message": f"Imagen {filename} no se pudo decodificar",
+                "task_id": self.request.id
+            }
+
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        quality, reason = quality_gate(gray)
+        if reason:
+            return {
+                "status": "rejected",
+                "message": reason,
+                "quality": quality,
+                "task_id": self.request.id
+            }
+
+        location, faces_detected = detect_largest_face(gray)
+        if location is None:
+            return {
+                "status": "rejected",
+                "message": "No se detectó ningún rostro",
+                "quality": quality,
+                "task_id": self.request.id
+            }
+
+        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        encoding = face_recognition.face_encodings(rgb_image, known_face_locations=[location])[0]
+        user_id, distance = match_face(encoding)
+
         return {
             "status": "success",
             "message": f"Imagen {filename} procesada correctamente",
-            "verified": True,
-            "confidence": 0.95,
+            "verified": user_id is not None,
+            "user_id": user_id,
+            "distance": distance,
+            "confidence": None if distance is None else round(1 - distance, 4),
+            "faces_detected": faces_detected,
+            "quality": quality,
             "task_id": self.request.id
         }
-        
+
     except Exception as e:
         logger.error(f"Error procesando imagen: {str(e)}")
         return {
-            "status": "error", 
+            "status": "error",
             "message": f"Error procesando imagen: {str(e)}",
             "task_id": self.request.id
-        }
\ No newline at end of file
+        }
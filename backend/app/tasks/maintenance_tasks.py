@@ -0,0 +1,51 @@
+from app.core.celery import celery_app
+from app.core.blob_store import blob_store
+from app.core.config import settings
+from app.core.database import connect, db
+from contextlib import closing
+from app.core.security_logs import rotate_partitions
+from app.core.stats import reconcile_counters
+import logging
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task(name="cleanup_blob_store")
+def cleanup_blob_store():
+    """
+    Elimina del blob store los payloads que superaron su TTL
+    """
+    removed = blob_store.cleanup()
+    logger.info(f"Blob store: {removed} archivos expirados eliminados")
+    return {"removed": removed}
+
+@celery_app.task(name="rotate_security_logs")
+def rotate_security_logs():
+    """
+    Mueve los días cerrados de security_logs a particiones diarias y aplica
+    la retención de particiones y del resumen horario (solo SQLite)
+    """
+    if not db.is_sqlite:
+        return {"skipped": f"Particiones diarias no soportadas en {db.dialect}"}
+    with closing(connect(db.path)) as conn:
+        result = rotate_partitions(
+            conn,
+            settings.SECURITY_LOG_RETENTION_DAYS,
+            settings.SECURITY_LOG_ROLLUP_RETENTION_DAYS,
+        )
+    logger.info(
+        f"security_logs: {sum(result['moved'].values())} filas movidas a particiones, "
+        f"{len(result['dropped'])} particiones eliminadas"
+    )
+    return result
+
+@celery_app.task(name="reconcile_system_counters")
+def reconcile_system_counters():
+    """
+    Compara system_counters con las tablas reales y corrige cualquier deriva
+    (solo SQLite: en otros motores los contadores se calculan al leerlos)
+    """
+    if not db.is_sqlite:
+        return {"skipped": f"Sin contadores materializados en {db.dialect}"}
+    with closing(connect(db.path)) as conn:
+        drift = reconcile_counters(conn)
+    return {"drift": drift}
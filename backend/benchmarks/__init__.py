@@ -0,0 +1,6 @@
+# backend/benchmarks
+"""
+Scripts de medición de rendimiento. Se ejecutan desde backend/ como módulos:
+
+    python -m benchmarks.voice_features
+"""
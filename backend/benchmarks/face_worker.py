@@ -0,0 +1,169 @@
+# backend/benchmarks/face_worker.py
+"""
+Throughput del worker de reconocimiento facial, sin broker: tiempo por etapa
+del pipeline en memoria (decodificar, control de calidad, detectar,
+codificar, comparar) e imágenes por segundo de process_face_recognition con
+varios procesos, como un worker con -c N.
+
+También mide la ruta anterior (escribir temp_images/, cv2.imread y borrar)
+contra cv2.imdecode desde el buffer.
+
+Uso (desde backend/):
+    python -m benchmarks.face_worker --imagenes fotos/ --procesos 1 2 4
+    python -m benchmarks.face_worker --repeticiones 50
+
+Sin --imagenes se usan imágenes sintéticas de 640x480, 1920x1080 y 4000x3000
+(sin rostros: las etapas de codificar y comparar solo se miden con fotos
+reales y face_recognition instalado).
+"""
+import argparse
+import importlib.util
+import os
+import statistics
+import tempfile
+import time
+import uuid
+import multiprocessing as mp
+import numpy as np
+
+# Un hilo BLAS/OpenCV por proceso: el paralelismo lo dan los procesos
+for _var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_var, "1")
+
+INDEX_SIZE = 10000  # Rostros registrados simulados para la etapa de comparación
+
+
+def imagenes_sinteticas():
+    import cv2
+
+    rng = np.random.default_rng(0)
+    imagenes = {}
+    for width, height in ((640, 480), (1920, 1080), (4000, 3000)):
+        gradiente = np.linspace(40, 200, width, dtype=np.float32)[None, :, None]
+        image = np.clip(gradiente + rng.normal(0, 25, (height, width, 3)), 0, 255).astype(np.uint8)
+        imagenes[f"sintetica_{width}x{height}.jpg"] = cv2.imencode(".jpg", image)[1].tobytes()
+    return imagenes
+
+
+def leer_imagenes(directorio):
+    imagenes = {}
+    for nombre in sorted(os.listdir(directorio)):
+        if nombre.lower().endswith((".jpg", ".jpeg", ".png")):
+            with open(os.path.join(directorio, nombre), "rb") as f:
+                imagenes[nombre] = f.read()
+    return imagenes
+
+
+def cronometrar(fn, repeticiones):
+    """Mediana en ms (después de una llamada de calentamiento) y el último resultado"""
+    resultado = fn()
+    tiempos = []
+    for _ in range(repeticiones):
+        start = time.perf_counter()
+        resultado = fn()
+        tiempos.append((time.perf_counter() - start) * 1000)
+    return statistics.median(tiempos), resultado
+
+
+def leer_desde_disco(data, filename):
+    """Ruta anterior: archivo en temp_images/, cv2.imread y borrado"""
+    import cv2
+
+    temp_dir = os.path.join(tempfile.gettempdir(), "temp_images")
+    os.makedirs(temp_dir, exist_ok=True)
+    file_path = os.path.join(temp_dir, f"{uuid.uuid4()}_{filename}")
+    with open(file_path, "wb") as f:
+        f.write(data)
+    try:
+        return cv2.imread(file_path, cv2.IMREAD_COLOR)
+    finally:
+        os.remove(file_path)
+
+
+def etapas(imagenes, repeticiones):
+    """Tiempo por etapa para cada imagen"""
+    import cv2
+    from app.tasks import image_tasks
+
+    try:
+        import face_recognition
+    except ImportError:
+        face_recognition = None
+        print("⚠️ face_recognition no está instalado: se omiten codificar y comparar")
+
+    index = np.random.default_rng(1).normal(0, 0.1, (INDEX_SIZE, 128))
+    # disco/memoria: leer la imagen completa desde archivo temporal o desde el buffer;
+    # decodificar incluye además la reducción a MAX_IMAGE_SIDE
+    columnas = ("disco", "memoria", "decodificar", "calidad", "detectar", "codificar", "comparar")
+    print(f"{'imagen':>28} " + " ".join(f"{c + ' (ms)':>14}" for c in columnas))
+
+    for nombre, data in imagenes.items():
+        tiempos = dict.fromkeys(columnas, None)
+        tiempos["disco"], _ = cronometrar(lambda: leer_desde_disco(data, nombre), repeticiones)
+        tiempos["memoria"], _ = cronometrar(
+            lambda: cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR), repeticiones
+        )
+        tiempos["decodificar"], image = cronometrar(lambda: image_tasks.decode_image(data), repeticiones)
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        tiempos["calidad"], _ = cronometrar(lambda: image_tasks.quality_gate(gray), repeticiones)
+        tiempos["detectar"], (location, _) = cronometrar(lambda: image_tasks.detect_largest_face(gray), repeticiones)
+
+        if face_recognition is not None and location is not None:
+            rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            tiempos["codificar"], encodings = cronometrar(
+                lambda: face_recognition.face_encodings(rgb, known_face_locations=[location]), repeticiones
+            )
+            tiempos["comparar"], _ = cronometrar(
+                lambda: face_recognition.face_distance(index, encodings[0]), repeticiones
+            )
+
+        print(f"{nombre[:28]:>28} " + " ".join(
+            f"{'-' if tiempos[c] is None else format(tiempos[c], '.2f'):>14}" for c in columnas
+        ))
+
+
+def _procesar(item):
+    from app.tasks.image_tasks import process_face_recognition
+
+    nombre, data = item
+    return process_face_recognition.apply(args=(data, nombre)).get()["status"]
+
+
+def throughput(imagenes, procesos, total):
+    """Imágenes por segundo de la tarea completa con N procesos"""
+    items = list(imagenes.items())
+    trabajo = [items[i % len(items)] for i in range(total)]
+    print(f"{'procesos':>9} {'imágenes/s':>11} {'estados':>30}")
+    for n in procesos:
+        with mp.Pool(n) as pool:
+            pool.map(_procesar, items * n)  # Calentamiento: cascada, modelos e índice por proceso
+            start = time.perf_counter()
+            estados = pool.map(_procesar, trabajo, chunksize=1)
+            elapsed = time.perf_counter() - start
+        conteo = ", ".join(f"{estado}={estados.count(estado)}" for estado in sorted(set(estados)))
+        print(f"{n:>9} {total / elapsed:>11.1f} {conteo:>30}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del worker de reconocimiento facial")
+    parser.add_argument("--imagenes", help="Directorio con fotos JPG/PNG (por defecto imágenes sintéticas)")
+    parser.add_argument("--repeticiones", type=int, default=20, help="Repeticiones por etapa")
+    parser.add_argument("--procesos", type=int, nargs="+", default=[1, mp.cpu_count()])
+    parser.add_argument("--total", type=int, default=200, help="Tareas por medición de throughput")
+    args = parser.parse_args()
+
+    imagenes = leer_imagenes(args.imagenes) if args.imagenes else imagenes_sinteticas()
+    if not imagenes:
+        raise SystemExit(f"❌ No hay imágenes JPG/PNG en {args.imagenes}")
+
+    print(f"📊 Etapas del pipeline ({len(imagenes)} imágenes, mediana de {args.repeticiones})")
+    etapas(imagenes, args.repeticiones)
+    print(f"\n📊 Throughput de process_face_recognition ({args.total} tareas)")
+    if importlib.util.find_spec("face_recognition") is None:
+        print("⚠️ face_recognition no está instalado: la tarea completa no se puede medir")
+        return
+    throughput(imagenes, sorted(set(args.procesos)), args.total)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# backend/benchmarks/queue_load.py
+"""
+Prueba de carga de las colas de Celery: latencia de process_face_recognition
+(desde el envío hasta que el worker la termina) sola y con un atraso de
+tareas de audio y de mantenimiento en sus colas.
+
+Requiere Redis y los tres workers documentados en app/core/celery.py
+(colas face, audio y bulk,default). Uso (desde backend/):
+    python -m benchmarks.queue_load --interactivas 50 --ritmo 5 --audio 40 --masivas 200
+    python -m benchmarks.queue_load --imagen rostro.jpg --max-p95-ms 1500
+
+Con --max-p95-ms el proceso termina con código 1 si el p95 con carga lo supera.
+"""
+import argparse
+import io
+import statistics
+import sys
+import time
+from datetime import timezone
+import numpy as np
+
+
+def imagen_sintetica():
+    """JPEG de 640x480 (sin rostro: el worker lo rechaza después de decodificar y controlar calidad)"""
+    import cv2
+
+    rng = np.random.default_rng(0)
+    gradiente = np.linspace(40, 200, 640, dtype=np.float32)[None, :, None]
+    image = np.clip(gradiente + rng.normal(0, 25, (480, 640, 3)), 0, 255).astype(np.uint8)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+def audio_sintetico(seconds, sample_rate=22050):
+    """WAV de voz sintética con pausas (varias ventanas de VAD por clip)"""
+    import soundfile as sf
+
+    rng = np.random.default_rng(1)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    voz = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 6))
+    pausas = (np.sin(2 * np.pi * 0.25 * t) > -0.3).astype(np.float32)
+    y = 0.2 * voz * pausas + 0.01 * rng.standard_normal(len(t))
+    buffer = io.BytesIO()
+    sf.write(buffer, y.astype(np.float32), sample_rate, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(int(len(valores) * p), len(valores) - 1)]
+
+
+def verificar_workers(celery_app):
+    """Colas con al menos un worker consumiendo"""
+    activas = celery_app.control.inspect(timeout=2).active_queues() or {}
+    return {queue["name"] for queues in activas.values() for queue in queues}
+
+
+def serie_interactiva(process_face_recognition, payload, n, ritmo, timeout):
+    """Enviar n tareas de rostro a ritmo fijo; latencia = date_done - envío"""
+    enviadas = []
+    intervalo = 1.0 / ritmo
+    inicio = time.monotonic()
+    for i in range(n):
+        # Ritmo constante: un atraso no acumula envíos en ráfaga
+        espera = inicio + i * intervalo - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+        enviadas.append((time.time(), process_face_recognition.apply_async(args=(payload, "carga.jpg"))))
+
+    latencias = []
+    for enviada_en, result in enviadas:
+        result.get(timeout=timeout, propagate=False)
+        terminada = result.date_done
+        if terminada is not None:
+            if terminada.tzinfo is None:
+                terminada = terminada.replace(tzinfo=timezone.utc)  # El backend guarda UTC
+            latencias.append((terminada.timestamp() - enviada_en) * 1000)
+    return latencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de las colas de Celery")
+    parser.add_argument("--interactivas", type=int, default=50, help="Tareas de rostro por fase")
+    parser.add_argument("--ritmo", type=float, default=5.0, help="Tareas de rostro por segundo")
+    parser.add_argument("--audio", type=int, default=40, help="Tareas de audio encoladas como carga")
+    parser.add_argument("--segundos-audio", type=float, default=30.0, help="Duración de cada clip de carga")
+    parser.add_argument("--masivas", type=int, default=200, help="Tareas de mantenimiento encoladas como carga")
+    parser.add_argument("--imagen", help="Imagen para las tareas de rostro (por defecto una sintética)")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--max-p95-ms", type=float, help="Fallar si el p95 con carga supera este valor")
+    args = parser.parse_args()
+
+    from app.core.blob_store import blob_store
+    from app.core.celery import celery_app, FACE_QUEUE, AUDIO_QUEUE, BULK_QUEUE
+    from app.core.config import settings
+    from app.tasks.audio_tasks import process_audio_task
+    from app.tasks.image_tasks import process_face_recognition
+    from app.tasks.maintenance_tasks import reconcile_system_counters
+    from kombu.exceptions import OperationalError
+
+    try:
+        faltantes = {FACE_QUEUE, AUDIO_QUEUE, BULK_QUEUE} - verificar_workers(celery_app)
+    except OperationalError as e:
+        print(f"❌ No se pudo conectar al broker ({settings.CELERY_BROKER_URL}): {e}")
+        sys.exit(2)
+    if faltantes:
+        print(f"❌ Sin workers para las colas: {', '.join(sorted(faltantes))} (ver app/core/celery.py)")
+        sys.exit(2)
+
+    if args.imagen:
+        with open(args.imagen, "rb") as f:
+            payload = f.read()
+    else:
+        payload = imagen_sintetica()
+
+    print(f"📊 {args.interactivas} tareas de rostro por fase a {args.ritmo:g}/s")
+    fases = {}
+
+    print("⏳ Fase 1: sin carga")
+    fases["sin carga"] = serie_interactiva(process_face_recognition, payload, args.interactivas, args.ritmo, args.timeout)
+
+    print(f"⏳ Fase 2: {args.audio} audios de {args.segundos_audio:g}s y {args.masivas} tareas masivas en cola")
+    audio_key = blob_store.put(audio_sintetico(args.segundos_audio))
+    carga = [process_audio_task.apply_async(args=(audio_key, "carga.wav")) for _ in range(args.audio)]
+    carga += [reconcile_system_counters.apply_async() for _ in range(args.masivas)]
+    fases["con carga"] = serie_interactiva(process_face_recognition, payload, args.interactivas, args.ritmo, args.timeout)
+    pendientes = sum(1 for result in carga if not result.ready())
+
+    print(f"{'fase':>10} {'n':>5} {'p50 (ms)':>9} {'p95 (ms)':>9} {'máx (ms)':>9}")
+    for fase, latencias in fases.items():
+        print(f"{fase:>10} {len(latencias):>5} {statistics.median(latencias):>9.1f} "
+              f"{percentil(latencias, 0.95):>9.1f} {max(latencias):>9.1f}")
+    print(f"📦 Tareas de carga aún pendientes al terminar la fase 2: {pendientes}/{len(carga)}")
+
+    if pendientes == 0:
+        print("⚠️ La carga terminó antes que la serie interactiva: aumentar --audio o --masivas")
+    p95 = percentil(fases["con carga"], 0.95)
+    if args.max_p95_ms is not None and p95 > args.max_p95_ms:
+        print(f"❌ p95 con carga {p95:.1f} ms > {args.max_p95_ms:g} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
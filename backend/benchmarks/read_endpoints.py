@@ -0,0 +1,204 @@
+# backend/benchmarks/read_endpoints.py
+"""
+Peticiones por segundo en las rutas de lectura de ciudadanos (consulta por
+DUI y página de 50 del listado), servidas por uvicorn en un subproceso.
+
+    --base pool      rutas reales sobre la capa de base de datos compartida
+    --base conexion  las mismas consultas con un sqlite3.connect() sin pragmas
+                     por petición, como antes del pool (línea base)
+
+Con --transporte asgi las peticiones se hacen en el mismo proceso (httpx
+ASGITransport), sin red ni uvicorn: útil en máquinas de uno o dos núcleos,
+donde el cliente y el servidor compiten por la CPU.
+
+Uso (desde backend/):
+    python -m benchmarks.read_endpoints --filas 10000 --concurrencia 1 50 --duracion 5
+    python -m benchmarks.read_endpoints --base conexion --transporte asgi
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+
+HOST = "127.0.0.1"
+
+
+def crear_app(base, db_path):
+    """Aplicación a medir (se importa después de fijar DATABASE_URL)"""
+    from fastapi import FastAPI, HTTPException
+
+    app = FastAPI()
+    if base == "pool":
+        from app.api.routes import ciudadanos
+        app.include_router(ciudadanos.router, prefix="/ciudadanos")
+        return app
+
+    # Mismas consultas y mismas respuestas que app.api.routes.ciudadanos
+    from app.api.routes.ciudadanos import COLUMNAS_LISTADO, _ciudadano_dict
+
+    @app.get("/ciudadanos/")
+    async def listar(despues_de: int = 0, limite: int = 50):
+        conn = sqlite3.connect(db_path)
+        try:
+            rows = conn.execute(
+                f"SELECT {COLUMNAS_LISTADO} FROM usuarios WHERE id > ? ORDER BY id LIMIT ?",
+                (despues_de, limite + 1)
+            ).fetchall()
+        finally:
+            conn.close()
+        items = [_ciudadano_dict(row) for row in rows[:limite]]
+        return {"items": items, "siguiente": items[-1]["id"] if len(rows) > limite else None}
+
+    @app.get("/ciudadanos/{dui}")
+    async def consultar(dui: str):
+        conn = sqlite3.connect(db_path)
+        try:
+            usuario = conn.execute(
+                "SELECT id, numero_identificacion, nombres, apellidos, email, fecha_nacimiento "
+                "FROM usuarios WHERE numero_identificacion = ?", (dui,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if not usuario:
+            raise HTTPException(status_code=404, detail="Usuario no encontrado")
+        return {
+            "id": usuario[0],
+            "dui": usuario[1],
+            "nombres": usuario[2],
+            "apellidos": usuario[3],
+            "email": usuario[4],
+            "fecha_nacimiento": usuario[5]
+        }
+
+    return app
+
+
+def dui(i):
+    return f"{i:08d}-{i % 10}"
+
+
+def sembrar(db_path, filas):
+    """Base migrada con `filas` ciudadanos"""
+    from database.migrations import migrate
+
+    migrate(db_path)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO usuarios (numero_identificacion, nombres, apellidos, tipo_identificacion, sector) "
+            "VALUES (?, ?, ?, 'DUI', 'general')",
+            ((dui(i), f"Nombre {i}", f"Apellido {i}") for i in range(filas))
+        )
+    conn.close()
+
+
+async def cargar(cliente_http, filas, concurrencia, duracion):
+    latencias = []
+    errores = 0
+    fin = time.perf_counter() + duracion
+
+    async def cliente(client, seed):
+        nonlocal errores
+        rng = random.Random(seed)
+        n = 0
+        while time.perf_counter() < fin:
+            if n % 2:
+                url = f"/ciudadanos/?despues_de={rng.randrange(max(filas - 50, 1))}&limite=50"
+            else:
+                url = f"/ciudadanos/{dui(rng.randrange(filas))}"
+            n += 1
+            start = time.perf_counter()
+            r = await client.get(url)
+            latencias.append(time.perf_counter() - start)
+            if r.status_code != 200:
+                errores += 1
+
+    async with cliente_http(concurrencia) as client:
+        await asyncio.gather(*(cliente(client, i) for i in range(concurrencia)))
+
+    latencias.sort()
+    return {
+        "req_s": len(latencias) / duracion,
+        "p50_ms": statistics.median(latencias) * 1000,
+        "p95_ms": latencias[int(len(latencias) * 0.95)] * 1000,
+        "errores": errores,
+    }
+
+
+def esperar_servidor(puerto, proceso, timeout=30):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError("El servidor terminó antes de aceptar conexiones")
+        try:
+            httpx.get(f"http://{HOST}:{puerto}/ciudadanos/{dui(0)}", timeout=1)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+
+def servir(args):
+    import uvicorn
+
+    uvicorn.run(crear_app(args.base, args.db), host=HOST, port=args.puerto, log_level="warning", access_log=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las rutas de lectura")
+    parser.add_argument("--base", choices=("pool", "conexion"), default="pool")
+    parser.add_argument("--db", default=None, help="Base SQLite (por defecto un archivo temporal)")
+    parser.add_argument("--filas", type=int, default=10000)
+    parser.add_argument("--concurrencia", type=int, nargs="+", default=[1, 50])
+    parser.add_argument("--duracion", type=float, default=5.0, help="Segundos por nivel de concurrencia")
+    parser.add_argument("--transporte", choices=("http", "asgi"), default="http")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--servir", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.servir:
+        return servir(args)
+
+    args.db = os.path.abspath(args.db or os.path.join(tempfile.mkdtemp(prefix="bench_"), "bench.db"))
+    sembrar(args.db, args.filas)
+
+    os.environ.update(DATABASE_URL=f"sqlite:///{args.db}", SQLITE_PATH=args.db)
+    if args.transporte == "asgi":
+        app = crear_app(args.base, args.db)
+        cliente_http = lambda n: httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+        return asyncio.run(medir(args, cliente_http))
+
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.read_endpoints", "--servir",
+         "--base", args.base, "--db", args.db, "--puerto", str(args.puerto)],
+    )
+    try:
+        esperar_servidor(args.puerto, proceso)
+        cliente_http = lambda n: httpx.AsyncClient(
+            base_url=f"http://{HOST}:{args.puerto}",
+            limits=httpx.Limits(max_connections=n, max_keepalive_connections=n),
+        )
+        asyncio.run(medir(args, cliente_http))
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+
+async def medir(args, cliente_http):
+    print(f"📊 base={args.base} transporte={args.transporte} filas={args.filas} duración={args.duracion:.0f}s")
+    print(f"{'concurrencia':>12} {'req/s':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'errores':>8}")
+    for concurrencia in args.concurrencia:
+        await cargar(cliente_http, args.filas, concurrencia, 1.0)  # Calentamiento
+        r = await cargar(cliente_http, args.filas, concurrencia, args.duracion)
+        print(f"{concurrencia:>12} {r['req_s']:>9.0f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['errores']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+# backend/database/migrations.py
+"""
+Migraciones versionadas del esquema SQLite.
+
+La versión aplicada se guarda en `PRAGMA user_version`. Si el esquema está al
+día, el arranque es una sola lectura de esa versión. Las migraciones pendientes
+se aplican en orden dentro de una transacción `BEGIN IMMEDIATE`: si varios
+workers arrancan a la vez, solo uno migra y los demás esperan el bloqueo y
+encuentran el esquema ya actualizado.
+
+Uso (desde backend/):
+    python -m database.migrations [ruta.db]    # por defecto el archivo de DATABASE_URL
+"""
+import sqlite3
+import sys
+
+LOCK_TIMEOUT_SECONDS = 30
+
+
+def _esquema_base(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo_identificacion TEXT NOT NULL DEFAULT 'DUI',
+            numero_identificacion TEXT NOT NULL UNIQUE,
+            nombres TEXT NOT NULL,
+            apellidos TEXT NOT NULL,
+            email TEXT,
+            fecha_nacimiento DATE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS voice_profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER NOT NULL,
+            voice_hash TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+        )
+    ''')
+    # Vectores de características de voz (float32 little-endian)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS voice_embeddings (
+            usuario_id INTEGER PRIMARY KEY,
+            dim INTEGER NOT NULL,
+            vector BLOB NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+        )
+    ''')
+    # Encoding facial de 128 valores separados por coma
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS face_profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER NOT NULL,
+            face_encoding TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS drones (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            estado TEXT DEFAULT 'activo',
+            ubicacion_lat REAL,
+            ubicacion_lng REAL,
+            bateria INTEGER DEFAULT 100,
+            ultima_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS security_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER,
+            accion TEXT NOT NULL,
+            descripcion TEXT,
+            ip_address TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _dui_a_identificacion(conn):
+    """Bases creadas con create_db.py: la columna dui pasa a numero_identificacion"""
+    columnas = {row[1] for row in conn.execute("PRAGMA table_info(usuarios)")}
+    if "dui" in columnas and "numero_identificacion" not in columnas:
+        conn.execute("ALTER TABLE usuarios RENAME COLUMN dui TO numero_identificacion")
+    if "tipo_identificacion" not in columnas:
+        conn.execute("ALTER TABLE usuarios ADD COLUMN tipo_identificacion TEXT NOT NULL DEFAULT 'DUI'")
+
+
+def _indices(conn):
+    # Actividad reciente: rango por created_at agrupado por accion (índice cubriente)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_security_logs_created_accion ON security_logs (created_at, accion)")
+    # Login por voz (usuario_id, voice_hash) y COUNT(DISTINCT usuario_id)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_voice_profiles_usuario ON voice_profiles (usuario_id, voice_hash)")
+    # Un rostro por usuario: INSERT OR REPLACE reemplaza el anterior. Antes de
+    # este índice cada registro agregaba una fila; se conserva la más reciente
+    conn.execute('''
+        DELETE FROM face_profiles
+        WHERE id NOT IN (SELECT MAX(id) FROM face_profiles GROUP BY usuario_id)
+    ''')
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_face_profiles_usuario ON face_profiles (usuario_id)")
+    # Listados por tipo de documento
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_usuarios_identificacion ON usuarios (tipo_identificacion, numero_identificacion)")
+
+
+def _datos_ejemplo(conn):
+    usuarios = [
+        # (tipo_identificacion, numero_identificacion, nombres, apellidos, email, fecha_nacimiento)
+        ('DUI', '12345678-9', 'Juan Carlos', 'Pérez García', 'juan.perez@example.com', '1990-05-15'),
+        ('DUI', '98765432-1', 'María Elena', 'López Martínez', 'maria.lopez@example.com', '1985-08-22'),
+
+        # Ejemplos de otros métodos
+        ('NIT', '0614-250786-102-3', 'Pedro Antonio', 'Ramírez Torres', 'pedro.ramirez@example.com', '1986-07-25'),
+        ('CARNET_MENORIDAD', 'MN-202455', 'Lucas Andrés', 'Gómez Ruiz', None, '2011-03-14'),
+        ('CARNET_RECIEN_NACIDO', 'RN-998877', 'Bebé', 'Recien Nacido', None, '2024-01-12'),
+        ('CARNET_ESCOLAR', 'CE-55221', 'Valeria Sofía', 'Martínez López', 'valeria.martinez@example.com', '2008-11-20'),
+        ('LICENCIA', 'B1234567', 'Carlos Alberto', 'Hernández Díaz', 'carlos.hernandez@example.com', '1992-04-10'),
+        ('PASAPORTE', 'A12345678', 'Ana Patricia', 'Morales Pérez', 'ana.morales@example.com', '1994-12-01'),
+    ]
+    conn.executemany('''
+        INSERT OR IGNORE INTO usuarios
+        (tipo_identificacion, numero_identificacion, nombres, apellidos, email, fecha_nacimiento)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', usuarios)
+
+    # Los drones no tienen clave única: solo sembrar una tabla vacía
+    if conn.execute("SELECT COUNT(*) FROM drones").fetchone()[0] == 0:
+        conn.executemany('''
+            INSERT INTO drones (nombre, estado, ubicacion_lat, ubicacion_lng, bateria)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [
+            ('DRONE-001', 'activo', 13.6929, -89.2182, 85),
+            ('DRONE-002', 'activo', 13.7000, -89.2000, 92),
+        ])
+
+
+def _sector_e_indices_keyset(conn):
+    columnas = {row[1] for row in conn.execute("PRAGMA table_info(usuarios)")}
+    if "sector" not in columnas:
+        conn.execute("ALTER TABLE usuarios ADD COLUMN sector TEXT NOT NULL DEFAULT 'ciudadano'")
+    # Paginación por id con filtro: (filtro, id) evita ordenar en memoria
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_usuarios_tipo_id ON usuarios (tipo_identificacion, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_usuarios_sector_id ON usuarios (sector, id)")
+
+
+def _resumen_horario_security_logs(conn):
+    # Conteo por hora y acción, mantenido por trigger en cada INSERT
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS security_logs_hourly (
+            hora TEXT NOT NULL,
+            accion TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            PRIMARY KEY (hora, accion)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_security_logs_hourly AFTER INSERT ON security_logs
+        BEGIN
+            INSERT INTO security_logs_hourly (hora, accion, total)
+            VALUES (strftime('%Y-%m-%d %H:00:00', NEW.created_at), NEW.accion, 1)
+            ON CONFLICT (hora, accion) DO UPDATE SET total = total + 1;
+        END
+    ''')
+    conn.execute("DELETE FROM security_logs_hourly")
+    conn.execute('''
+        INSERT INTO security_logs_hourly (hora, accion, total)
+        SELECT strftime('%Y-%m-%d %H:00:00', created_at), accion, COUNT(*)
+        FROM security_logs
+        GROUP BY 1, 2
+    ''')
+
+
+def _contadores_del_sistema(conn):
+    # Totales de /system-stats mantenidos por triggers; app.core.stats los reconcilia
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS system_counters (
+            nombre TEXT PRIMARY KEY,
+            valor INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        INSERT OR REPLACE INTO system_counters (nombre, valor) VALUES
+            ('usuarios', (SELECT COUNT(*) FROM usuarios)),
+            ('usuarios_voz', (SELECT COUNT(DISTINCT usuario_id) FROM voice_profiles)),
+            ('usuarios_rostro', (SELECT COUNT(*) FROM face_profiles)),
+            ('eventos_seguridad', (SELECT COALESCE(SUM(total), 0) FROM security_logs_hourly))
+    ''')
+    triggers = {
+        "trg_counter_usuarios_insert": '''AFTER INSERT ON usuarios BEGIN
+            UPDATE system_counters SET valor = valor + 1 WHERE nombre = 'usuarios'; END''',
+        "trg_counter_usuarios_delete": '''AFTER DELETE ON usuarios BEGIN
+            UPDATE system_counters SET valor = valor - 1 WHERE nombre = 'usuarios'; END''',
+        # voice_profiles admite varias filas por usuario: solo cuenta la primera
+        "trg_counter_voz_insert": '''AFTER INSERT ON voice_profiles
+            WHEN NOT EXISTS (SELECT 1 FROM voice_profiles WHERE usuario_id = NEW.usuario_id AND id <> NEW.id) BEGIN
+            UPDATE system_counters SET valor = valor + 1 WHERE nombre = 'usuarios_voz'; END''',
+        "trg_counter_voz_delete": '''AFTER DELETE ON voice_profiles
+            WHEN NOT EXISTS (SELECT 1 FROM voice_profiles WHERE usuario_id = OLD.usuario_id) BEGIN
+            UPDATE system_counters SET valor = valor - 1 WHERE nombre = 'usuarios_voz'; END''',
+        "trg_counter_rostro_insert": '''AFTER INSERT ON face_profiles BEGIN
+            UPDATE system_counters SET valor = valor + 1 WHERE nombre = 'usuarios_rostro'; END''',
+        "trg_counter_rostro_delete": '''AFTER DELETE ON face_profiles BEGIN
+            UPDATE system_counters SET valor = valor - 1 WHERE nombre = 'usuarios_rostro'; END''',
+        "trg_counter_eventos_insert": '''AFTER INSERT ON security_logs BEGIN
+            UPDATE system_counters SET valor = valor + 1 WHERE nombre = 'eventos_seguridad'; END''',
+    }
+    for nombre, cuerpo in triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {nombre} {cuerpo}")
+
+
+def _progreso_inscripcion_voz(conn):
+    # Estado por clip de enroll_voices.py (permite reanudar la inscripción masiva)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS voice_enrollment_progress (
+            clip_path TEXT PRIMARY KEY,
+            usuario_id INTEGER NOT NULL,
+            vector BLOB,
+            processed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_voice_enrollment_usuario
+        ON voice_enrollment_progress (usuario_id)
+    ''')
+
+
+# (versión, descripción, función). Nunca modificar una migración ya publicada:
+# los cambios nuevos van en una versión nueva al final de la lista.
+MIGRATIONS = [
+    (1, "esquema base", _esquema_base),
+    (2, "columna dui -> tipo/numero_identificacion", _dui_a_identificacion),
+    (3, "índices de consultas frecuentes", _indices),
+    (4, "datos de ejemplo", _datos_ejemplo),
+    (5, "sector de usuarios e índices de paginación", _sector_e_indices_keyset),
+    (6, "resumen horario de security_logs", _resumen_horario_security_logs),
+    (7, "contadores del sistema", _contadores_del_sistema),
+    (8, "progreso de la inscripción masiva de voz", _progreso_inscripcion_voz),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(db_path=None):
+    """Aplicar las migraciones pendientes; devuelve la versión final del esquema"""
+    if db_path is None:
+        from app.core.database import sqlite_path
+        db_path = sqlite_path()  # Archivo de DATABASE_URL
+    conn = sqlite3.connect(db_path, timeout=LOCK_TIMEOUT_SECONDS, isolation_level=None)
+    try:
+        version = schema_version(conn)
+        if version >= SCHEMA_VERSION:
+            return version
+
+        # Bloqueo de escritura: otro proceso que llegue aquí espera a que terminemos
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = schema_version(conn)
+            for numero, descripcion, aplicar in MIGRATIONS:
+                if numero <= version:
+                    continue
+                aplicar(conn)
+                conn.execute(f"PRAGMA user_version = {numero}")
+                print(f"🔄 Migración {numero} aplicada: {descripcion}")
+                version = numero
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return version
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else None
+    version = migrate(db_path)
+    print(f"✅ Esquema en la versión {version}")
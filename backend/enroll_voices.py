@@ -0,0 +1,177 @@
+# backend/enroll_voices.py
+"""
+Inscripción masiva de perfiles de voz a partir de grabaciones existentes.
+
+Uso (desde backend/):
+    python enroll_voices.py manifiesto.csv --workers 8
+
+El manifiesto es un CSV con columnas `usuario_id,ruta`. El progreso se guarda
+por clip en la base de datos, así que el proceso se puede interrumpir y volver
+a ejecutar: los clips ya procesados se omiten.
+"""
+import argparse
+import csv
+import os
+import time
+import multiprocessing as mp
+
+# Un hilo BLAS por proceso: el paralelismo lo da el pool
+for _var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMBA_NUM_THREADS"):
+    os.environ.setdefault(_var, "1")
+
+_service = None
+
+
+def _init_worker():
+    """Cargar librosa, compilar kernels y llenar cachés de filtros una vez por proceso"""
+    global _service
+    import numpy as np
+    from app.api.routes.voice_ml import VoiceMLService, TARGET_SAMPLE_RATE
+
+    _service = VoiceMLService()
+    t = np.arange(TARGET_SAMPLE_RATE, dtype=np.float32) / TARGET_SAMPLE_RATE
+    _service.pipeline.extract(0.3 * np.sin(2 * np.pi * 220 * t), TARGET_SAMPLE_RATE)
+
+
+def _extract(item):
+    """Extraer el vector de un clip (se ejecuta en el proceso trabajador)"""
+    import numpy as np
+
+    usuario_id, clip_path = item
+    try:
+        with open(clip_path, "rb") as f:
+            features = _service.extract_voice_features(f.read())
+    except OSError as e:
+        print(f"⚠️ No se pudo leer {clip_path}: {e}")
+        features = None
+
+    if features is None:
+        return usuario_id, clip_path, None
+    return usuario_id, clip_path, np.asarray(features, dtype="<f4").tobytes()
+
+
+def read_manifest(path, done):
+    """Leer el manifiesto omitiendo los clips ya procesados"""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip().isdigit():
+                continue  # encabezado o línea vacía
+            usuario_id, clip_path = int(row[0]), row[1].strip()
+            if clip_path not in done:
+                yield usuario_id, clip_path
+
+
+def write_batch(conn, batch):
+    """Guardar un lote de resultados en una sola transacción"""
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO voice_enrollment_progress (clip_path, usuario_id, vector) VALUES (?, ?, ?)",
+            [(clip_path, usuario_id, vector) for usuario_id, clip_path, vector in batch]
+        )
+
+
+def build_embeddings(conn, batch_size):
+    """Promediar los clips de cada usuario y escribir voice_embeddings en bloque"""
+    import numpy as np
+    from app.api.routes.voice_ml import VoiceMLService
+
+    service = VoiceMLService()
+    read_cursor = conn.cursor()
+    read_cursor.execute('''
+        SELECT usuario_id, vector FROM voice_enrollment_progress
+        WHERE vector IS NOT NULL
+        ORDER BY usuario_id
+    ''')
+
+    embeddings, profiles = [], []
+    current_id, vectors = None, []
+    total = 0
+
+    def flush():
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO voice_embeddings (usuario_id, dim, vector) VALUES (?, ?, ?)",
+                embeddings
+            )
+            conn.executemany('''
+                INSERT INTO voice_profiles (usuario_id, voice_hash)
+                SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM voice_profiles WHERE usuario_id = ?)
+            ''', profiles)
+        embeddings.clear()
+        profiles.clear()
+
+    def close_user():
+        mean = np.mean(vectors, axis=0).astype("<f4")
+        embeddings.append((current_id, mean.shape[0], mean.tobytes()))
+        profiles.append((current_id, service.create_voice_signature(mean.tolist()), current_id))
+
+    for usuario_id, blob in read_cursor:
+        if usuario_id != current_id and vectors:
+            close_user()
+            total += 1
+            vectors = []
+            if len(embeddings) >= batch_size:
+                flush()
+        current_id = usuario_id
+        vectors.append(np.frombuffer(blob, dtype="<f4"))
+
+    if vectors:
+        close_user()
+        total += 1
+    flush()
+    return total
+
+
+def run(manifest, db_path, workers, batch_size, chunksize):
+    from app.core.database import connect
+
+    conn = connect(db_path)  # Aplica las migraciones (incluye voice_enrollment_progress)
+    done = {row[0] for row in conn.execute("SELECT clip_path FROM voice_enrollment_progress")}
+    print(f"🔄 {len(done)} clips ya procesados, se omitirán")
+
+    ctx = mp.get_context("spawn")
+    processed = failed = 0
+    batch = []
+    start = last_report = time.perf_counter()
+
+    with ctx.Pool(processes=workers, initializer=_init_worker) as pool:
+        for result in pool.imap_unordered(_extract, read_manifest(manifest, done), chunksize=chunksize):
+            batch.append(result)
+            processed += 1
+            failed += result[2] is None
+
+            if len(batch) >= batch_size:
+                write_batch(conn, batch)
+                batch = []
+
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                print(f"   {processed} clips ({processed / (now - start):.1f} clips/s, {failed} descartados)")
+                last_report = now
+
+    if batch:
+        write_batch(conn, batch)
+
+    elapsed = time.perf_counter() - start
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"✅ {processed} clips en {elapsed:.1f}s ({rate:.1f} clips/s, {failed} descartados)")
+
+    usuarios = build_embeddings(conn, batch_size)
+    conn.close()
+    print(f"✅ {usuarios} perfiles de voz actualizados")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inscripción masiva de perfiles de voz")
+    parser.add_argument("manifest", help="CSV con columnas usuario_id,ruta")
+    parser.add_argument("--db", default=None, help="Ruta de la base de datos SQLite (por defecto DATABASE_URL)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=500, help="Filas por transacción")
+    parser.add_argument("--chunksize", type=int, default=16, help="Clips por envío al pool")
+    args = parser.parse_args()
+
+    run(args.manifest, args.db, args.workers, args.batch_size, args.chunksize)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# backend/import_ciudadanos.py
+"""
+Importación masiva de ciudadanos desde CSV o NDJSON.
+
+Uso (desde backend/):
+    python import_ciudadanos.py padron.csv
+    python import_ciudadanos.py padron.ndjson --rechazos rechazos.ndjson
+
+El CSV necesita encabezado con las columnas tipo_identificacion,
+numero_identificacion (o dui), nombres, apellidos, email y fecha_nacimiento.
+Las filas inválidas o duplicadas se escriben en el archivo de rechazos (NDJSON)
+y no detienen la importación.
+"""
+import argparse
+import json
+import os
+import time
+from itertools import islice
+
+
+def run(path, db_path, formato, rechazos_path, batch_size, commit_every):
+    from app.api.routes.ciudadanos import CiudadanoImporter
+    from app.core.database import sync_engine
+
+    engine = sync_engine(f"sqlite:///{db_path}" if db_path else None)
+    conn = engine.connect()
+    importer = CiudadanoImporter(formato)
+    last_report = time.perf_counter()
+    sin_confirmar = 0
+
+    with open(path, encoding="utf-8-sig", newline="") as f, \
+            open(rechazos_path, "w", encoding="utf-8") as rechazos_file:
+        while True:
+            lineas = list(islice(f, batch_size))
+            if not lineas:
+                break
+
+            for rechazo in importer.importar_lote(conn, lineas):
+                rechazos_file.write(json.dumps(rechazo, ensure_ascii=False, default=str) + "\n")
+
+            # Transacciones grandes: se confirma cada commit_every líneas
+            sin_confirmar += len(lineas)
+            if sin_confirmar >= commit_every:
+                conn.commit()
+                sin_confirmar = 0
+
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                r = importer.resumen()
+                print(f"   {r['procesados']} filas ({r['filas_por_segundo']:.0f} filas/s, {r['rechazados']} rechazadas)")
+                last_report = now
+
+    conn.commit()
+    conn.close()
+    engine.dispose()
+
+    r = importer.resumen()
+    print(f"✅ {r['insertados']} ciudadanos importados de {r['procesados']} filas en {r['segundos']}s "
+          f"({r['filas_por_segundo']:.0f} filas/s)")
+    if r["rechazados"]:
+        print(f"⚠️ {r['rechazados']} filas rechazadas, ver {rechazos_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importación masiva de ciudadanos")
+    parser.add_argument("archivo", help="CSV con encabezado o NDJSON")
+    parser.add_argument("--db", default=None, help="Ruta de la base de datos SQLite (por defecto DATABASE_URL)")
+    parser.add_argument("--formato", choices=("csv", "ndjson"), help="Por defecto según la extensión")
+    parser.add_argument("--rechazos", help="Archivo NDJSON de rechazos (por defecto <archivo>.rechazos.ndjson)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Filas validadas e insertadas por lote")
+    parser.add_argument("--commit-every", type=int, default=100000, help="Filas por transacción")
+    args = parser.parse_args()
+
+    formato = args.formato or ("ndjson" if args.archivo.endswith((".ndjson", ".jsonl")) else "csv")
+    rechazos = args.rechazos or f"{os.path.splitext(args.archivo)[0]}.rechazos.ndjson"
+    run(args.archivo, args.db, formato, rechazos, args.batch_size, args.commit_every)
+
+
+if __name__ == "__main__":
+    main()
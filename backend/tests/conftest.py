@@ -0,0 +1,12 @@
+# backend/tests/conftest.py
+"""
+Configuración común: las pruebas usan una base de datos SQLite y un blob store
+temporales. Las variables se fijan antes de importar app.core.config.
+"""
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="idn_tests_")
+os.environ["SQLITE_PATH"] = os.path.join(_TMP, "idn_test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.environ['SQLITE_PATH']}"
+os.environ["BLOB_STORE_DIR"] = os.path.join(_TMP, "blob_store")
@@ -0,0 +1,68 @@
+import io
+import wave
+import numpy as np
+import pytest
+from app.core.blob_store import blob_store
+from app.tasks import audio_tasks
+from app.api.routes.voice_ml import VoiceMLService, load_audio, TARGET_SAMPLE_RATE
+from app.tasks.audio_tasks import process_audio_task
+
+
+def _wav_float32(y, sample_rate):
+    """WAV mono IEEE float (formato 3); el módulo wave solo escribe PCM"""
+    data = np.asarray(y, dtype="<f4").tobytes()
+    fmt = (b"fmt " + (16).to_bytes(4, "little") + (3).to_bytes(2, "little") + (1).to_bytes(2, "little")
+           + sample_rate.to_bytes(4, "little") + (sample_rate * 4).to_bytes(4, "little")
+           + (4).to_bytes(2, "little") + (32).to_bytes(2, "little"))
+    body = b"WAVE" + fmt + b"data" + len(data).to_bytes(4, "little") + data
+    return b"RIFF" + len(body).to_bytes(4, "little") + body
+
+
+def _tono(seconds, sample_rate=TARGET_SAMPLE_RATE):
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+@pytest.fixture
+def sin_transcripcion(monkeypatch):
+    """Sin reconocimiento de voz en línea ni backend de resultados"""
+    monkeypatch.setattr(VoiceMLService, "transcribe", lambda self, y, sample_rate, language=None: "hola")
+    progreso = []
+    monkeypatch.setattr(audio_tasks, "report_progress", lambda task, meta: progreso.append(meta))
+    return progreso
+
+
+def test_wav_float32_nativo_es_vista_sin_copia():
+    """El caso que originó la regresión: decode_wav devuelve una vista del buffer"""
+    y, sample_rate = load_audio(_wav_float32(_tono(1.0), TARGET_SAMPLE_RATE), duration=None)
+    assert sample_rate == TARGET_SAMPLE_RATE
+    assert not y.flags.owndata
+
+
+def test_audio_task_wav_float32_desde_blob_store(sin_transcripcion):
+    y = _tono(2.0)
+    key = blob_store.put(_wav_float32(y, TARGET_SAMPLE_RATE))
+    try:
+        result = process_audio_task.apply(args=(key, "clip.wav")).get()
+    finally:
+        blob_store.delete(key)
+
+    assert result["status"] == "success", result
+    assert result["duration_seconds"] == pytest.approx(2.0, abs=0.01)
+    assert result["transcription"].startswith("hola")
+    assert sin_transcripcion[-1]["current"] == sin_transcripcion[-1]["total"]
+
+
+def test_audio_task_wav_pcm16(sin_transcripcion):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes((_tono(1.0, 16000) * 32767).astype("<i2").tobytes())
+    key = blob_store.put(buffer.getvalue())
+    try:
+        result = process_audio_task.apply(args=(key, "clip.wav")).get()
+    finally:
+        blob_store.delete(key)
+    assert result["status"] == "success", result
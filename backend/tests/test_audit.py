@@ -0,0 +1,41 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.routes import ciudadanos
+from app.core import audit
+from app.core.audit import audit_log
+from app.core.database import db
+
+
+def _app():
+    app = FastAPI()
+    app.include_router(ciudadanos.router, prefix="/ciudadanos")
+    return app
+
+
+def _eventos(accion):
+    with TestClient(_app()) as client:
+        return client.portal.call(
+            db.fetchall, "SELECT descripcion FROM security_logs WHERE accion = :accion", {"accion": accion}
+        )
+
+
+def test_apagado_escribe_los_eventos_encolados(monkeypatch):
+    # Con un intervalo largo el evento solo se escribe si el apagado vacía la cola
+    monkeypatch.setattr(audit_log, "flush_interval", 60)
+    with TestClient(_app()) as client:
+        client.portal.call(audit_log.log, "TEST_SHUTDOWN", "pendiente al apagar")
+        assert _eventos("TEST_SHUTDOWN") == []
+    assert [r[0] for r in _eventos("TEST_SHUTDOWN")] == ["pendiente al apagar"]
+
+
+def test_fallo_de_auditoria_no_oculta_el_registro(monkeypatch):
+    def falla(conn, rows):
+        raise RuntimeError("disco lleno")
+
+    monkeypatch.setattr(audit, "_insert_batch", falla)
+    client = TestClient(_app())
+    r = client.post("/ciudadanos/", json={"dui": "40000001-1", "nombres": "Auditoría", "apellidos": "Fallida"})
+    assert r.status_code == 200
+    assert r.json()["success"] is True
+    monkeypatch.undo()
+    assert client.get("/ciudadanos/40000001-1").status_code == 200
@@ -0,0 +1,48 @@
+import asyncio
+import hashlib
+import io
+import threading
+from starlette.datastructures import UploadFile
+from app.core.blob_store import blob_store
+
+
+class _Upload(UploadFile):
+    def __init__(self, data):
+        super().__init__(io.BytesIO(data), filename="clip.wav")
+
+
+def test_read_payload_en_linea_y_desbordado():
+    pequeno = b"x" * 100
+    payload, digest = asyncio.run(blob_store.read_payload(_Upload(pequeno), inline_limit=1024))
+    assert payload == pequeno and digest == hashlib.sha256(pequeno).hexdigest()
+
+    grande = bytes(range(256)) * 40
+    payload, digest = asyncio.run(blob_store.read_payload(_Upload(grande), inline_limit=1024, chunk_size=1000))
+    assert payload == {"blob": digest} and digest == hashlib.sha256(grande).hexdigest()
+    with blob_store.open_payload(payload) as view:
+        assert bytes(view) == grande
+
+
+def test_put_upload_escribe_fuera_del_event_loop(monkeypatch):
+    hilos = set()
+    original = blob_store.writer
+
+    def writer():
+        w = original()
+        write = w.write
+
+        def registrar(chunk):
+            hilos.add(threading.get_ident())
+            write(chunk)
+        w.write = registrar
+        return w
+
+    monkeypatch.setattr(blob_store, "writer", writer)
+    data = b"y" * 5000
+
+    async def main():
+        return threading.get_ident(), await blob_store.put_upload(_Upload(data), chunk_size=1000)
+
+    loop_thread, key = asyncio.run(main())
+    assert key == hashlib.sha256(data).hexdigest()
+    assert hilos and loop_thread not in hilos
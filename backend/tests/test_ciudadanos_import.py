@@ -0,0 +1,100 @@
+import json
+import os
+import shutil
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.api.routes import ciudadanos
+from app.api.routes.ciudadanos import CiudadanoImporter
+from app.core.blob_store import blob_store
+from app.core.database import sync_engine
+
+LEGACY_DB = os.path.join(os.path.dirname(__file__), "..", "..", "idn_sv.db")
+
+app = FastAPI()
+app.include_router(ciudadanos.router, prefix="/ciudadanos")
+client = TestClient(app)
+
+
+def _csv(filas):
+    return "dui,nombres,apellidos,email\n" + "".join(f"{d},{n},{a},{e}\n" for d, n, a, e in filas)
+
+
+def test_importacion_con_rechazos():
+    body = _csv([
+        ("10000001-1", "Ana", "López", "ana@example.com"),
+        ("10000001-1", "Ana", "López", ""),           # repetida en el archivo
+        ("123", "Luis", "Pérez", ""),                  # DUI inválido
+        ("10000002-1", "Eva", "Ruiz", ""),
+    ])
+    r = client.post("/ciudadanos/importar", content=body.encode(), headers={"content-type": "text/csv"})
+    assert r.status_code == 200
+    resumen = r.json()
+    assert (resumen["procesados"], resumen["insertados"], resumen["rechazados"]) == (4, 2, 2)
+
+    r = client.get(f"/ciudadanos/importar/rechazos/{resumen['rechazos_key']}")
+    assert r.status_code == 200
+    motivos = [json.loads(linea)["motivo"] for linea in r.text.splitlines()]
+    assert motivos == ["Identificación repetida en el archivo", "DUI con formato inválido"]
+
+
+def test_rechazos_no_sirve_otros_blobs():
+    key = blob_store.put(b"evidencia de audio")
+    assert client.get(f"/ciudadanos/importar/rechazos/{key}").status_code == 404
+
+
+def test_insercion_concurrente_no_pierde_el_lote(monkeypatch):
+    """Si otra inserción gana la carrera tras la deduplicación, solo esa fila se rechaza"""
+    client.post("/ciudadanos/", json={"dui": "20000001-1", "nombres": "Ya", "apellidos": "Existe"})
+    monkeypatch.setattr(CiudadanoImporter, "deduplicar",
+                        lambda self, conn, validas: (validas, []))
+
+    body = _csv([("20000002-1", "Uno", "A", ""), ("20000001-1", "Dos", "B", ""), ("20000003-1", "Tres", "C", "")])
+    r = client.post("/ciudadanos/importar", content=body.encode(), headers={"content-type": "text/csv"})
+    assert r.status_code == 200
+    resumen = r.json()
+    assert (resumen["insertados"], resumen["rechazados"]) == (2, 1)
+    assert resumen["muestra_rechazos"][0]["linea"] == 3
+    assert "UNIQUE" in resumen["muestra_rechazos"][0]["motivo"]
+    assert client.get("/ciudadanos/20000003-1").status_code == 200
+
+
+def test_lote_sin_confirmar_se_revierte(tmp_path):
+    """Los savepoints del lote no confirman: rollback descarta todo el lote"""
+    path = str(tmp_path / "rollback.db")
+    engine = sync_engine(f"sqlite:///{path}")
+    otra = sync_engine(f"sqlite:///{path}")
+    contar = text("SELECT COUNT(*) FROM usuarios WHERE numero_identificacion LIKE '4000000%'")
+    with engine.connect() as conn, otra.connect() as lector:
+        importer = CiudadanoImporter("csv")
+        importer.importar_lote(conn, _csv([("40000001-1", "Uno", "A", ""), ("40000002-1", "Dos", "B", "")]).splitlines())
+        assert importer.insertados == 2
+        assert lector.execute(contar).scalar() == 0  # Nada visible antes del commit
+        lector.rollback()
+        conn.rollback()
+        assert conn.execute(contar).scalar() == 0
+        assert conn.execute(text("SELECT COUNT(*) FROM security_logs WHERE accion = 'USER_BULK_IMPORT'")).scalar() == 0
+    engine.dispose()
+    otra.dispose()
+
+
+@pytest.mark.skipif(not os.path.exists(LEGACY_DB), reason="idn_sv.db no está en el repositorio")
+def test_base_heredada_con_email_unico(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    shutil.copy(LEGACY_DB, path)
+    engine = sync_engine(f"sqlite:///{path}")
+    with engine.connect() as conn:
+        email = conn.execute(text("SELECT email FROM usuarios WHERE email IS NOT NULL LIMIT 1")).scalar()
+        importer = CiudadanoImporter("csv")
+        rechazos = importer.importar_lote(conn, _csv([
+            ("30000001-1", "Uno", "A", ""),
+            ("30000002-1", "Dos", "B", email),   # email UNIQUE en el esquema antiguo
+            ("30000003-1", "Tres", "C", ""),
+        ]).splitlines())
+        conn.commit()
+        assert importer.insertados == 2
+        assert [r["linea"] for r in rechazos] == [3]
+        total = conn.execute(text("SELECT COUNT(*) FROM usuarios WHERE numero_identificacion LIKE '3000000%'")).scalar()
+        assert total == 2
+    engine.dispose()
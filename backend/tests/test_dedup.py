@@ -0,0 +1,47 @@
+import pytest
+from app.core import dedup
+from app.core.redis import redis_client
+
+
+class FakeTask:
+    name = "tarea_prueba"
+
+    def __init__(self):
+        self.enviadas = []
+
+    def apply_async(self, args, task_id):
+        self.enviadas.append(task_id)
+
+
+class FakeResult:
+    def __init__(self, state, result=None):
+        self.state = state
+        self.result = result
+
+
+@pytest.fixture
+def resultados(monkeypatch):
+    estados = {}
+    monkeypatch.setattr(dedup.celery_app, "AsyncResult", lambda task_id: estados[task_id])
+    yield estados
+    for key in redis_client.scan_iter(f"{dedup.DEDUP_KEY_PREFIX}{FakeTask.name}:*"):
+        redis_client.delete(key)
+
+
+@pytest.mark.parametrize("estado,resultado,reutilizada", [
+    ("PENDING", None, True),
+    ("SUCCESS", {"status": "success"}, True),
+    ("SUCCESS", {"status": "rejected", "reason": "Imagen borrosa"}, True),
+    ("SUCCESS", {"status": "error", "error": "timeout"}, False),
+    ("FAILURE", None, False),
+])
+def test_solo_se_reutilizan_tareas_sin_error(resultados, estado, resultado, reutilizada):
+    task = FakeTask()
+    primera, deduplicada = dedup.submit_once(task, (), f"sha256:{estado}{resultado}")
+    assert not deduplicada
+
+    resultados[primera] = FakeResult(estado, resultado)
+    segunda, deduplicada = dedup.submit_once(task, (), f"sha256:{estado}{resultado}")
+    assert deduplicada is reutilizada
+    assert (segunda == primera) is reutilizada
+    assert len(task.enviadas) == (1 if reutilizada else 2)
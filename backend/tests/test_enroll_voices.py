@@ -0,0 +1,21 @@
+import numpy as np
+import enroll_voices
+from app.core.database import connect
+
+
+def test_inscripcion_reanudable(tmp_path):
+    conn = connect(str(tmp_path / "enroll.db"))  # Migraciones: crea voice_enrollment_progress
+    vector = lambda v: np.full(8, v, dtype="<f4").tobytes()
+    enroll_voices.write_batch(conn, [(1, "a.wav", vector(1.0)), (1, "b.wav", vector(3.0)), (2, "c.wav", None)])
+
+    done = {row[0] for row in conn.execute("SELECT clip_path FROM voice_enrollment_progress")}
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text("usuario_id,ruta\n1,a.wav\n1,b.wav\n2,c.wav\n2,d.wav\n")
+    assert list(enroll_voices.read_manifest(manifest, done)) == [(2, "d.wav")]
+
+    assert enroll_voices.build_embeddings(conn, batch_size=10) == 1
+    dim, blob = conn.execute("SELECT dim, vector FROM voice_embeddings WHERE usuario_id = 1").fetchone()
+    assert dim == 8
+    np.testing.assert_allclose(np.frombuffer(blob, dtype="<f4"), 2.0)
+    assert conn.execute("SELECT COUNT(*) FROM voice_profiles WHERE usuario_id = 1").fetchone()[0] == 1
+    conn.close()
@@ -0,0 +1,40 @@
+"""Migraciones sobre bases de datos creadas con el esquema anterior"""
+import sqlite3
+from database import migrations
+
+
+def test_rostros_duplicados_conservan_el_mas_reciente(tmp_path):
+    path = str(tmp_path / "antigua.db")
+    conn = sqlite3.connect(path)
+    migrations._esquema_base(conn)
+    conn.execute("INSERT INTO usuarios (numero_identificacion, nombres, apellidos) VALUES ('00000001-1', 'A', 'B')")
+    conn.execute("INSERT INTO usuarios (numero_identificacion, nombres, apellidos) VALUES ('00000002-2', 'C', 'D')")
+    # register_face sin índice único: cada registro agregaba una fila
+    conn.executemany(
+        "INSERT INTO face_profiles (usuario_id, face_encoding) VALUES (?, ?)",
+        [(1, "viejo"), (2, "unico"), (1, "nuevo")]
+    )
+    conn.commit()
+    conn.close()
+
+    assert migrations.migrate(path) == migrations.SCHEMA_VERSION
+
+    conn = sqlite3.connect(path)
+    rostros = conn.execute("SELECT usuario_id, face_encoding FROM face_profiles ORDER BY usuario_id").fetchall()
+    contador = conn.execute("SELECT valor FROM system_counters WHERE nombre = 'usuarios_rostro'").fetchone()[0]
+    conn.close()
+    assert rostros == [(1, "nuevo"), (2, "unico")]
+    assert contador == 2
+
+
+def test_sin_ruta_se_usa_database_url(tmp_path, monkeypatch):
+    from app.core.config import settings
+    import create_db
+
+    path = tmp_path / "desde_url.db"
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{path}")
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "otra.db"))
+
+    create_db.init_database()
+    assert path.exists() and not (tmp_path / "otra.db").exists()
+    assert migrations.migrate() == migrations.SCHEMA_VERSION
@@ -0,0 +1,61 @@
+"""Las consultas frecuentes deben usar sus índices (EXPLAIN QUERY PLAN)"""
+import os
+import shutil
+import sqlite3
+import pytest
+from database.migrations import migrate
+
+LEGACY_DB = os.path.join(os.path.dirname(__file__), "..", "..", "idn_sv.db")
+
+# Consulta -> índice que debe aparecer en su plan
+QUERY_PLAN_CHECKS = (
+    ("""
+        SELECT accion, COUNT(*) FROM security_logs
+        WHERE created_at >= datetime('now', '-1 day') GROUP BY accion
+    """, "idx_security_logs_created_accion"),
+    ("SELECT COUNT(DISTINCT usuario_id) FROM voice_profiles", "idx_voice_profiles_usuario"),
+    ("SELECT id FROM voice_profiles WHERE usuario_id = ? AND voice_hash = ?", "idx_voice_profiles_usuario"),
+    ("SELECT face_encoding FROM face_profiles WHERE usuario_id = ?", "idx_face_profiles_usuario"),
+    ("SELECT id FROM usuarios WHERE numero_identificacion = ?", "sqlite_autoindex_usuarios"),
+    ("SELECT id FROM usuarios WHERE tipo_identificacion = ? ORDER BY numero_identificacion", "idx_usuarios_identificacion"),
+    ("SELECT id FROM usuarios WHERE id > ? ORDER BY id LIMIT 100", "INTEGER PRIMARY KEY"),
+    ("SELECT accion, SUM(total) FROM security_logs_hourly WHERE hora >= ? GROUP BY accion", "PRIMARY KEY"),
+    ("SELECT id FROM usuarios WHERE tipo_identificacion = ? AND id > ? ORDER BY id LIMIT 100", "idx_usuarios_tipo_id"),
+    ("SELECT id FROM usuarios WHERE sector = ? AND id > ? ORDER BY id LIMIT 100", "idx_usuarios_sector_id"),
+    ("SELECT clip_path FROM voice_enrollment_progress WHERE usuario_id = ?", "idx_voice_enrollment_usuario"),
+)
+
+
+def query_plan(conn, sql):
+    params = (None,) * sql.count("?")
+    return " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+@pytest.fixture(scope="module", params=["nueva", "heredada"])
+def conn(request, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("plans") / "plans.db")
+    if request.param == "heredada":
+        # Base de datos versionada en el repositorio, migrada desde su esquema antiguo
+        if not os.path.exists(LEGACY_DB):
+            pytest.skip("idn_sv.db no está en el repositorio")
+        shutil.copy(LEGACY_DB, path)
+    migrate(path)
+    conn = sqlite3.connect(path)
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("sql,index", QUERY_PLAN_CHECKS, ids=[index for _, index in QUERY_PLAN_CHECKS])
+def test_consulta_usa_indice(conn, sql, index):
+    plan = query_plan(conn, sql)
+    assert index in plan, f"La consulta no usa {index}: {' '.join(sql.split())}\nPlan: {plan}"
+
+
+def test_regresion_de_indice_se_detecta(tmp_path):
+    path = str(tmp_path / "sin_indice.db")
+    migrate(path)
+    conn = sqlite3.connect(path)
+    conn.execute("DROP INDEX idx_usuarios_sector_id")
+    sql, index = QUERY_PLAN_CHECKS[-2]
+    assert index not in query_plan(conn, sql)
+    conn.close()
@@ -0,0 +1,65 @@
+import sqlite3
+from datetime import date, timedelta
+import pytest
+from app.core.security_logs import partition_name, partitions, rotate_partitions
+from database.migrations import migrate
+
+HOY = date(2026, 3, 15)
+AYER = HOY - timedelta(days=1)
+VENCIDO = HOY - timedelta(days=100)
+
+
+@pytest.fixture
+def conn(tmp_path):
+    path = str(tmp_path / "logs.db")
+    migrate(path)
+    conn = sqlite3.connect(path)
+    eventos = [
+        (f"{HOY} 08:00:00", "LOGIN"),
+        (f"{HOY} 09:30:00", "LOGIN"),
+        (f"{AYER} 23:59:59", "LOGIN"),
+        (f"{AYER} 10:00:00", "FACE_VERIFY"),
+        (f"{VENCIDO} 12:00:00", "LOGIN"),
+    ]
+    with conn:
+        conn.executemany("INSERT INTO security_logs (accion, created_at) VALUES (?, ?)", [(a, c) for c, a in eventos])
+    yield conn
+    conn.close()
+
+
+def _estado(conn):
+    tablas = {
+        tabla: conn.execute(f"SELECT id, accion, created_at FROM {tabla} ORDER BY id").fetchall()
+        for tabla in ["security_logs", *partitions(conn).values()]
+    }
+    resumen = conn.execute("SELECT hora, accion, total FROM security_logs_hourly ORDER BY hora, accion").fetchall()
+    return tablas, resumen
+
+
+def test_rotacion_mueve_dias_cerrados_y_aplica_retencion(conn):
+    result = rotate_partitions(conn, retention_days=90, rollup_retention_days=30, today=HOY)
+
+    assert result["moved"] == {AYER.isoformat(): 2, VENCIDO.isoformat(): 1}
+    assert result["dropped"] == [partition_name(VENCIDO)]
+    assert result["rollup_deleted"] == 1
+
+    # El día en curso se queda en security_logs; solo sobrevive la partición de ayer
+    assert partitions(conn) == {AYER: partition_name(AYER)}
+    hoy = conn.execute("SELECT created_at FROM security_logs ORDER BY created_at").fetchall()
+    assert hoy == [(f"{HOY} 08:00:00",), (f"{HOY} 09:30:00",)]
+    ayer = conn.execute(f"SELECT accion, created_at FROM {partition_name(AYER)} ORDER BY created_at").fetchall()
+    assert ayer == [("FACE_VERIFY", f"{AYER} 10:00:00"), ("LOGIN", f"{AYER} 23:59:59")]
+
+    # El resumen horario conserva lo que está dentro de su retención
+    horas = [hora for hora, _, _ in _estado(conn)[1]]
+    assert horas == [f"{AYER} 10:00:00", f"{AYER} 23:00:00", f"{HOY} 08:00:00", f"{HOY} 09:00:00"]
+
+
+def test_rotacion_es_idempotente(conn):
+    rotate_partitions(conn, retention_days=90, rollup_retention_days=30, today=HOY)
+    antes = _estado(conn)
+
+    result = rotate_partitions(conn, retention_days=90, rollup_retention_days=30, today=HOY)
+
+    assert result == {"moved": {}, "dropped": [], "rollup_deleted": 0}
+    assert _estado(conn) == antes
@@ -0,0 +1,31 @@
+import datetime
+import numpy as np
+import pytest
+from app.core.serialization import dumps, loads
+
+
+@pytest.mark.parametrize("array", [
+    np.array(3.5),
+    np.arange(6, dtype=np.float32).reshape(2, 3),
+    np.zeros((0, 128)),
+    np.arange(4, dtype=">i4"),
+])
+def test_ndarray_round_trip(array):
+    decoded = loads(dumps({"a": array}))["a"]
+    assert decoded.shape == array.shape
+    assert decoded.dtype.kind == array.dtype.kind
+    np.testing.assert_array_equal(decoded, array)
+
+
+def test_fechas_y_escalares():
+    payload = {
+        "cuando": datetime.datetime(2024, 5, 1, 12, 30),
+        "dia": datetime.date(2024, 5, 1),
+        "x": np.float32(1.5),
+        "grande": np.ones(10000),
+    }
+    decoded = loads(dumps(payload))
+    assert decoded["cuando"] == payload["cuando"]
+    assert decoded["dia"] == payload["dia"]
+    assert decoded["x"] == 1.5
+    np.testing.assert_array_equal(decoded["grande"], payload["grande"])
@@ -0,0 +1,71 @@
+import hashlib
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.routes import uploads
+from app.core.blob_store import blob_store
+
+app = FastAPI()
+app.include_router(uploads.router)
+client = TestClient(app)
+
+
+def _sha(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _crear(data, sha256=None):
+    r = client.post("/uploads", json={"filename": "evidencia.mp4", "size": len(data), "sha256": sha256})
+    assert r.status_code == 200
+    return r.json()["upload_id"]
+
+
+def _subir(upload_id, data, offset=0):
+    return client.put(f"/uploads/{upload_id}/chunks", params={"offset": offset},
+                      content=data, headers={"X-Chunk-SHA256": _sha(data)})
+
+
+def test_subida_por_bloques():
+    data = b"a" * 1000 + b"b" * 500
+    upload_id = _crear(data, _sha(data))
+    assert _subir(upload_id, data[1000:], 1000).status_code == 200
+    assert client.get(f"/uploads/{upload_id}").json()["missing_ranges"] == [[0, 1000]]
+    assert _subir(upload_id, data[:1000]).status_code == 200
+
+    r = client.post(f"/uploads/{upload_id}/finalize", params={"process": False})
+    assert r.status_code == 200
+    assert r.json()["blob_key"] == _sha(data)
+    with blob_store.open(r.json()["blob_key"]) as view:
+        assert bytes(view) == data
+
+
+def test_hash_incorrecto_no_borra_blobs_ni_la_sesion():
+    esperado = b"contenido correcto"
+    recibido = b"contenido alterado"
+    en_uso = blob_store.put(recibido)  # Mismo contenido que la subida corrupta, usado por otra tarea
+
+    upload_id = _crear(esperado, _sha(esperado))
+    assert _subir(upload_id, recibido).status_code == 200
+    r = client.post(f"/uploads/{upload_id}/finalize", params={"process": False})
+    assert r.status_code == 422
+    assert blob_store.exists(en_uso)
+
+    # La sesión sigue viva: se reenvía el bloque y se finaliza
+    assert client.get(f"/uploads/{upload_id}").status_code == 200
+    assert _subir(upload_id, esperado).status_code == 200
+    r = client.post(f"/uploads/{upload_id}/finalize", params={"process": False})
+    assert r.status_code == 200
+    assert r.json()["blob_key"] == _sha(esperado)
+    assert blob_store.exists(en_uso)
+
+
+def test_bloque_demasiado_grande(monkeypatch):
+    monkeypatch.setattr(uploads, "MAX_CHUNK_SIZE", 1024)
+    upload_id = _crear(b"x" * 4096)
+    assert _subir(upload_id, b"x" * 2048).status_code == 413
+
+    # Sin Content-Length (transferencia por partes) también se corta
+    partes = iter([b"x" * 600, b"x" * 600])
+    r = client.put(f"/uploads/{upload_id}/chunks", params={"offset": 0},
+                   content=partes, headers={"X-Chunk-SHA256": _sha(b"x" * 1200)})
+    assert r.status_code == 413
+    assert client.get(f"/uploads/{upload_id}").json()["received_bytes"] == 0
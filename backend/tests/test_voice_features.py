@@ -0,0 +1,43 @@
+import librosa
+import numpy as np
+import pytest
+from app.api.routes.voice_ml import VoiceFeaturePipeline, TARGET_SAMPLE_RATE
+
+
+def caracteristicas_librosa(y, sr):
+    """Implementación anterior: tres llamadas de librosa, cada una con su STFT"""
+    mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+    spectral_centroid = librosa.feature.spectral_centroid(y=y, sr=sr)
+    chroma = librosa.feature.chroma_stft(y=y, sr=sr)
+    return np.concatenate([
+        np.mean(mfcc, axis=1),
+        np.std(mfcc, axis=1),
+        np.mean(spectral_centroid, axis=1),
+        np.mean(chroma, axis=1)
+    ])
+
+
+def _voz_sintetica(seconds, seed, sample_rate=TARGET_SAMPLE_RATE):
+    """Armónicos con vibrato y ruido: la afinación estimada no es 0"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    f0 = rng.uniform(100, 260) * (1 + 0.01 * np.sin(2 * np.pi * 5 * t))
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    y = sum(np.sin(k * phase) / k for k in range(1, 8)) + 0.05 * rng.standard_normal(len(t))
+    return (0.2 * y).astype(np.float32)
+
+
+@pytest.mark.parametrize("seconds,seed", [(0.5, 0), (1.0, 1), (3.0, 2), (3.0, 3)])
+def test_equivale_a_las_llamadas_de_librosa(seconds, seed):
+    y = _voz_sintetica(seconds, seed)
+    esperado = caracteristicas_librosa(y, TARGET_SAMPLE_RATE)
+    obtenido = VoiceFeaturePipeline().extract(y, TARGET_SAMPLE_RATE)
+    assert obtenido.shape == esperado.shape == (13 + 13 + 1 + 12,)
+    np.testing.assert_allclose(obtenido, esperado, rtol=1e-6, atol=1e-6)
+
+
+def test_equivale_con_otra_frecuencia_de_muestreo():
+    y = _voz_sintetica(1.0, 4, sample_rate=16000)
+    np.testing.assert_allclose(
+        VoiceFeaturePipeline().extract(y, 16000), caracteristicas_librosa(y, 16000), rtol=1e-6, atol=1e-6
+    )
@@ -0,0 +1,89 @@
+import io
+import os
+import numpy as np
+import pytest
+import soundfile as sf
+from app.api.routes import voice_ml
+from app.api.routes.voice_ml import load_audio, TARGET_SAMPLE_RATE
+
+
+def _tono(seconds, sample_rate=TARGET_SAMPLE_RATE, freq=220.0):
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+    return (0.3 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def test_mp3_desde_bytes_sin_archivo_temporal(monkeypatch):
+    buffer = io.BytesIO()
+    sf.write(buffer, _tono(1.0), TARGET_SAMPLE_RATE, format="MP3")
+    monkeypatch.setattr(voice_ml, "_load_spilled", lambda *a: pytest.fail("no debería volcar a disco"))
+
+    y, sample_rate = load_audio(buffer.getvalue(), duration=None)
+    assert sample_rate == TARGET_SAMPLE_RATE
+    assert abs(len(y) - TARGET_SAMPLE_RATE) < 2048  # relleno del codificador
+
+
+def test_formato_no_reconocido_se_decodifica_desde_archivo(monkeypatch):
+    """M4A: soundfile no lo abre desde memoria, así que pasa por audioread con una ruta"""
+    original = voice_ml.librosa.load
+    rutas = []
+
+    def load(source, **kwargs):
+        if isinstance(source, str):
+            rutas.append(source)
+            with open(source, "rb") as f:
+                assert f.read() == m4a
+            return np.zeros(100, dtype=np.float32), kwargs["sr"]
+        return original(source, **kwargs)
+
+    m4a = b"\x00\x00\x00\x20ftypM4A " + b"\x00" * 2048
+    monkeypatch.setattr(voice_ml.librosa, "load", load)
+
+    y, sample_rate = load_audio(m4a)
+    assert len(y) == 100 and sample_rate == TARGET_SAMPLE_RATE
+    assert len(rutas) == 1 and not os.path.exists(rutas[0])
+
+
+def test_indice_de_voz_ve_inscripciones_de_otros_procesos(monkeypatch):
+    from app.api.routes.voice_ml import VoiceMLService
+
+    rng = np.random.default_rng(0)
+    vector_a, vector_b = rng.normal(size=(2, 32))
+    worker, cli = VoiceMLService(), VoiceMLService()
+
+    worker.enroll_voice(1, vector_a)
+    assert worker.identify_voice(vector_b, threshold=0.99) == []
+
+    # Otro proceso (p. ej. enroll_voices.py) inscribe al usuario 2
+    cli.enroll_voice(2, vector_b)
+    assert worker.identify_voice(vector_b, threshold=0.99) == []  # Aún dentro del TTL
+
+    monkeypatch.setattr(voice_ml, "VOICE_INDEX_TTL_SECONDS", 0)
+    assert worker.identify_voice(vector_b, threshold=0.99)[0]["usuario_id"] == 2
+
+
+def test_inscripcion_de_voz_cuenta_en_usuarios_voz():
+    from sqlalchemy import text
+    from app.api.routes.voice_ml import VoiceMLService
+    from app.core.database import db
+    from app.core.stats import COUNTER_QUERIES
+
+    def contadores(conn):
+        guardado = conn.execute(text("SELECT valor FROM system_counters WHERE nombre = 'usuarios_voz'")).scalar()
+        return guardado, conn.execute(text(COUNTER_QUERIES["usuarios_voz"])).scalar()
+
+    with db.connection() as conn:
+        usuario_id = conn.execute(text(
+            "INSERT INTO usuarios (numero_identificacion, nombres, apellidos) VALUES ('60000001-1', 'Voz', 'Nueva') RETURNING id"
+        )).scalar()
+        conn.commit()
+        antes, _ = contadores(conn)
+
+    service = VoiceMLService()
+    vector = np.random.default_rng(3).normal(size=32)
+    service.enroll_voice(usuario_id, vector)
+    service.enroll_voice(usuario_id, vector)  # Reinscribir no duplica el perfil
+
+    with db.connection() as conn:
+        assert contadores(conn) == (antes + 1, antes + 1)
+        perfiles = text("SELECT COUNT(*) FROM voice_profiles WHERE usuario_id = :u")
+        assert conn.execute(perfiles, {"u": usuario_id}).scalar() == 1